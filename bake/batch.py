@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import traceback
+import bpy
+
+# Headless batch bake.
+#
+#   blender --background scene.blend --python <addon>/bake/batch.py -- \
+#       --tree NodeTree --start 1 --end 250 --substeps 2 --cache //umog_cache --save
+#
+# Blender runs this file as __main__, outside of the addon package, so the
+# addon is enabled first and its modules are imported by name. auto_load
+# imports this module as well, which is why nothing runs on import.
+# A JSON summary of every baked tree is printed as the last line of the
+# output (and written to --stats); the exit code is 1 if any tree failed.
+
+addonDirectory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+addonName = os.path.basename(addonDirectory)
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(prog = "blender --background file.blend --python batch.py --",
+                                     description = "Bake GrowthNodes trees without the user interface")
+    parser.add_argument("--tree", action = "append", dest = "trees", default = [],
+                        help = "Node tree to bake, can be repeated (default: all GrowthNodes trees)")
+    parser.add_argument("--start", type = int, help = "First frame of the bake")
+    parser.add_argument("--end", type = int, help = "Frame on which the bake stops")
+    parser.add_argument("--substeps", type = int, help = "Substeps per frame")
+    parser.add_argument("--cache", help = "Bake into a frame cache in this directory instead of shape keys")
+    parser.add_argument("--encoding", choices = ("FLOAT32", "FLOAT16", "QUANTIZED", "SPARSE"),
+                        help = "Encoding of the frame cache")
+    parser.add_argument("--checkpoint", type = int,
+                        help = "Write a checkpoint every this many frames")
+    parser.add_argument("--resume", action = "store_true",
+                        help = "Continue every tree from its latest checkpoint")
+    parser.add_argument("--profile", action = "store_true", help = "Add node timings to the summary")
+    parser.add_argument("--stats", help = "Also write the JSON summary to this file")
+    parser.add_argument("--save", action = "store_true",
+                        help = "Save the .blend file after baking (keeps shape keys and cache links)")
+    return parser.parse_args(argv)
+
+
+def enableAddon():
+    import addon_utils
+    if addonName not in bpy.context.preferences.addons:
+        sys.path.insert(0, os.path.dirname(addonDirectory))
+        addon_utils.enable(addonName, default_set = True)
+    return importlib.import_module(addonName)
+
+
+def configureTree(tree, arguments):
+    props = tree.properties
+    if arguments.end is not None:
+        props.EndFrame = arguments.end
+    if arguments.start is not None:
+        props.StartFrame = arguments.start
+    if arguments.substeps is not None:
+        props.Substeps = arguments.substeps
+    if arguments.cache is not None:
+        props.BakeTarget = "CACHE"
+        props.CacheDirectory = arguments.cache
+    if arguments.encoding is not None:
+        props.CacheEncoding = arguments.encoding
+    if arguments.checkpoint is not None:
+        props.CheckpointInterval = arguments.checkpoint
+    props.ProfileBake = arguments.profile
+
+
+def bakeTree(addon, tree, arguments):
+    props = tree.properties
+    stats = {"tree": tree.name, "startFrame": props.StartFrame, "endFrame": props.EndFrame,
+             "substeps": props.Substeps, "target": props.BakeTarget, "frames": 0}
+
+    # the tree would report invalid links with a popup
+    if not tree.areLinksValid():
+        stats["status"] = "failed"
+        stats["error"] = "Node tree contains links with mismatched types"
+        return stats
+
+    checkpoint = None
+    if arguments.resume:
+        checkpoint = addon.bake.checkpoint.loadLatestCheckpoint(tree)
+        problem = "No checkpoint to resume from" if checkpoint is None else checkpoint.getProblem(tree)
+        if problem is not None:
+            stats["status"] = "failed"
+            stats["error"] = problem
+            return stats
+        stats["resumedAfter"] = checkpoint.frame
+
+    startFrame = props.StartFrame if checkpoint is None else checkpoint.frame + 1
+    progress = addon.bake.progress.BakeProgress(startFrame, props.EndFrame)
+    reportEvery = max(1, progress.totalFrames // 100)
+
+    try:
+        for frame in tree.bakeFrames(addon.node_tree.UMOGReferenceHolder(), checkpoint):
+            progress.update(frame)
+            if progress.bakedFrames % reportEvery == 0:
+                print("[GrowthNodes] " + tree.name + ": " + progress.getStatus(), flush = True)
+    except Exception:
+        stats["status"] = "failed"
+        stats["error"] = traceback.format_exc()
+    else:
+        stats["status"] = "baked"
+
+    stats["frames"] = progress.bakedFrames
+    stats["seconds"] = progress.elapsed
+    stats["framesPerSecond"] = progress.bakedFrames / max(progress.elapsed, 1e-9)
+    stats["objects"] = [getObjectStats(obj) for obj in tree.getOutputObjects()]
+    stats["textureBuffers"] = addon.texture.buffers.textureBuffers.getStats()
+
+    profile = addon.utils.profiler.lastProfiles.get(tree.name)
+    if arguments.profile and profile is not None:
+        stats["profile"] = profile.toDict()
+
+    return stats
+
+
+def getObjectStats(obj):
+    stats = {"name": obj.name, "vertices": len(obj.data.vertices)}
+    if obj.umogCacheDirectory != "":
+        indexPath = os.path.join(bpy.path.abspath(obj.umogCacheDirectory), "index.json")
+        with open(indexPath) as indexFile:
+            index = json.load(indexFile)
+        stats["cache"] = {"directory": obj.umogCacheDirectory,
+                          "frameCount": index["frameCount"],
+                          "rawBytes": index["rawBytes"],
+                          "storedBytes": index["storedBytes"]}
+    return stats
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    arguments = parseArguments(argv)
+    addon = enableAddon()
+
+    trees = [tree for tree in bpy.data.node_groups if tree.bl_idname == "umog_UMOGNodeTree"]
+    if len(arguments.trees) > 0:
+        missing = [name for name in arguments.trees if name not in bpy.data.node_groups]
+        if len(missing) > 0:
+            print("[GrowthNodes] Unknown node trees: " + ", ".join(missing), file = sys.stderr)
+            sys.exit(2)
+        trees = [bpy.data.node_groups[name] for name in arguments.trees]
+
+    summary = {"file": bpy.data.filepath, "trees": []}
+    start = time.perf_counter()
+    for tree in trees:
+        configureTree(tree, arguments)
+        summary["trees"].append(bakeTree(addon, tree, arguments))
+    summary["seconds"] = time.perf_counter() - start
+
+    failed = any(stats["status"] != "baked" for stats in summary["trees"])
+    if arguments.save and not failed:
+        bpy.ops.wm.save_mainfile()
+
+    if arguments.stats is not None:
+        with open(arguments.stats, "w") as statsFile:
+            json.dump(summary, statsFile, indent = 1)
+    print(json.dumps(summary), flush = True)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import os
+import bpy
+import json
+import glob
+import bisect
+import shutil
+import numpy as np
+from ..mesh.arrays import readShapeCoordinates
+from .topology import readTopology, getTopologyHash
+from .codec import encodeDelta, encodeSparseDelta, packDeltas, applyDelta
+
+# On-disk frame cache, an alternative bake target to shape keys.
+#
+# Every baked object gets a directory with an index.json and chunk files.
+# A chunk stores the positions of its first frame (float32) as keyframe and,
+# for every following frame, the difference to the previous frame in one of
+# the encodings of codec.py. Chunks can be decoded independently of each
+# other, so the chunk index gives random access to the keyframes.
+#
+# Compressed chunks are single .npz files. Uncompressed chunks are folders
+# of .npy files that playback memory-maps instead of loading.
+#
+# The topology (loops and polygons) is only stored on frames where its hash
+# changed; every chunk references the topology its positions belong to.
+
+indexFileName = "index.json"
+chunkName = "chunk_{:05d}"
+topologyName = "topology_{:05d}.npz"
+
+
+class FrameCacheWriter:
+    def __init__(self, directory, encoding = "FLOAT16", chunkSize = 32, compress = True,
+                 tolerance = 1e-5, resume = None):
+        self.directory = directory
+        self.encoding = encoding
+        self.chunkSize = max(chunkSize, 1)
+        self.compress = compress
+        self.tolerance = tolerance
+        self.chunks = []
+        self.topologies = []
+        self.frameCount = 0
+        self.rawBytes = 0
+        self.resetChunk()
+
+        # a resumed bake keeps the files written up to its checkpoint
+        if resume is not None:
+            self.chunks = resume["chunks"]
+            self.topologies = resume["topologies"]
+            self.frameCount = resume["frameCount"]
+            self.rawBytes = resume["rawBytes"]
+        keep = {entry["file"] for entry in self.chunks + self.topologies}
+
+        discardCacheReader(directory)
+        os.makedirs(directory, exist_ok = True)
+        for path in glob.glob(os.path.join(directory, "chunk_*")) + glob.glob(
+                os.path.join(directory, "topology_*")):
+            if os.path.basename(path) in keep:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def resetChunk(self):
+        self.frames = []
+        self.keyframe = None
+        self.deltas = []
+        self.scales = []
+        self.previous = None
+
+    def write(self, frame, coords, topology = None):
+        coords = np.asarray(coords, dtype = np.float32)
+
+        if topology is not None:
+            self.writeTopology(topology)
+
+        # a new vertex count can't be expressed as a delta
+        if self.previous is not None and self.previous.shape != coords.shape:
+            self.flush()
+
+        if self.previous is None:
+            self.keyframe = coords.copy()
+            self.previous = coords.copy()
+        elif self.encoding == "SPARSE":
+            indices, values = encodeSparseDelta(coords - self.previous, self.tolerance)
+            self.deltas.append((indices, values))
+            self.previous[indices] += values
+        else:
+            encoded, scale, decoded = encodeDelta(coords - self.previous, self.encoding)
+            self.deltas.append(encoded)
+            self.scales.append(scale)
+            self.previous += decoded
+
+        self.frameCount += 1
+        self.rawBytes += coords.nbytes
+        self.frames.append(frame)
+        if len(self.frames) >= self.chunkSize:
+            self.flush()
+
+    def writeTopology(self, topology):
+        topologyHash = getTopologyHash(topology)
+        if len(self.topologies) > 0 and self.topologies[-1]["hash"] == topologyHash:
+            return
+
+        # positions of different topologies never share a chunk
+        self.flush()
+        fileName = topologyName.format(len(self.topologies))
+        np.savez_compressed(os.path.join(self.directory, fileName), **topology)
+        self.topologies.append({"file": fileName, "hash": topologyHash})
+
+    def flush(self):
+        if len(self.frames) == 0:
+            return
+
+        arrays = {
+            "frames": np.array(self.frames, dtype = np.int32),
+            "keyframe": self.keyframe}
+        arrays.update(packDeltas(self.encoding, self.deltas, self.scales, self.keyframe.shape))
+
+        name = chunkName.format(len(self.chunks))
+        if self.compress:
+            fileName = name + ".npz"
+            np.savez_compressed(os.path.join(self.directory, fileName), **arrays)
+        else:
+            fileName = name
+            os.makedirs(os.path.join(self.directory, fileName))
+            for key, array in arrays.items():
+                np.save(os.path.join(self.directory, fileName, key + ".npy"), array)
+
+        self.chunks.append({
+            "file": fileName,
+            "start": self.frames[0],
+            "end": self.frames[-1],
+            "vertexCount": len(self.keyframe),
+            "topology": len(self.topologies) - 1})
+        self.resetChunk()
+
+    def checkpoint(self):
+        '''Stores the open chunk and returns the state to resume writing from'''
+        self.flush()
+        self.writeIndex()
+        return {"chunks": list(self.chunks), "topologies": list(self.topologies),
+                "frameCount": self.frameCount, "rawBytes": self.rawBytes}
+
+    def close(self):
+        self.flush()
+        return self.writeIndex()
+
+    def writeIndex(self):
+        index = {
+            "version": 1,
+            "encoding": self.encoding,
+            "chunkSize": self.chunkSize,
+            "tolerance": self.tolerance,
+            "frameCount": self.frameCount,
+            "rawBytes": self.rawBytes,
+            "storedBytes": self.getStoredBytes(),
+            "chunks": self.chunks,
+            "topologies": self.topologies}
+        with open(os.path.join(self.directory, indexFileName), "w") as indexFile:
+            json.dump(index, indexFile, indent = 1)
+        discardCacheReader(self.directory)
+        return index
+
+    def getStoredBytes(self):
+        paths = [os.path.join(self.directory, entry["file"]) for entry in self.chunks + self.topologies]
+        storedBytes = 0
+        for path in paths:
+            if os.path.isdir(path):
+                storedBytes += sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+            else:
+                storedBytes += os.path.getsize(path)
+        return storedBytes
+
+
+class FrameCacheReader:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, indexFileName)) as indexFile:
+            self.index = json.load(indexFile)
+        self.chunks = self.index["chunks"]
+        self.starts = [chunk["start"] for chunk in self.chunks]
+        self.loadedChunk = None
+        self.loadedArrays = None
+        self.topologies = self.index.get("topologies", [])
+        self.loadedTopologies = {}
+
+    @property
+    def frameRange(self):
+        if len(self.chunks) == 0:
+            return None
+        return self.chunks[0]["start"], self.chunks[-1]["end"]
+
+    def findChunk(self, frame):
+        '''Chunk holding frame; frames outside the cache are clamped'''
+        position = bisect.bisect_right(self.starts, frame) - 1
+        return self.chunks[max(position, 0)]
+
+    def loadChunk(self, chunk):
+        '''Returns the arrays of a chunk; uncompressed chunks are memory-mapped'''
+        if self.loadedChunk is not chunk:
+            path = os.path.join(self.directory, chunk["file"])
+            if path.endswith(".npz"):
+                with np.load(path) as data:
+                    self.loadedArrays = {key: data[key] for key in data.files}
+            else:
+                self.loadedArrays = {name[:-4]: np.load(os.path.join(path, name), mmap_mode = "r")
+                                     for name in os.listdir(path) if name.endswith(".npy")}
+            self.loadedChunk = chunk
+        return self.loadedArrays
+
+    def loadTopology(self, chunk):
+        '''Returns the topology arrays of a chunk, None if it has no topology'''
+        index = chunk.get("topology", -1)
+        if index < 0:
+            return None
+        if index not in self.loadedTopologies:
+            path = os.path.join(self.directory, self.topologies[index]["file"])
+            with np.load(path) as data:
+                self.loadedTopologies[index] = {key: data[key] for key in data.files}
+        return self.loadedTopologies[index]
+
+    def locate(self, frame):
+        '''Returns (chunk, position in chunk, stored frame) for the frame shown at frame'''
+        chunk = self.findChunk(frame)
+        frames = self.loadChunk(chunk)["frames"]
+        position = max(int(np.searchsorted(frames, frame, side = "right")) - 1, 0)
+        return chunk, position, int(frames[position])
+
+    def read(self, frame):
+        if len(self.chunks) == 0:
+            return None
+
+        chunk, position, storedFrame = self.locate(frame)
+        arrays = self.loadChunk(chunk)
+        coords = np.array(arrays["keyframe"], dtype = np.float32)
+        for index in range(position):
+            applyDelta(arrays, index, coords)
+        return coords
+
+
+# absolute cache directory -> FramePlayback, filled by the playback module
+cacheReaders = {}
+
+
+def discardCacheReader(directory):
+    cacheReaders.pop(directory, None)
+
+
+class BakeCache:
+    '''Records the shape of every object baked by a tree once per frame'''
+
+    def __init__(self, tree, resume = None):
+        properties = tree.properties
+        self.objects = tree.getOutputObjects()
+        # relative to the .blend file if the cache directory starts with //
+        self.directories = {}
+        self.writers = {}
+
+        for obj in self.objects:
+            directory = os.path.join(properties.CacheDirectory, bpy.path.clean_name(tree.name),
+                                     bpy.path.clean_name(obj.name))
+            self.directories[obj.name] = directory
+            self.writers[obj.name] = FrameCacheWriter(bpy.path.abspath(directory),
+                properties.CacheEncoding, properties.CacheChunkSize, properties.CacheCompress,
+                properties.CacheTolerance, None if resume is None else resume.get(obj.name))
+            # stop streaming old cache frames into the mesh while baking
+            obj.umogCacheDirectory = ""
+
+    def recordFrame(self, frame):
+        for obj in self.objects:
+            self.writers[obj.name].write(frame, readShapeCoordinates(obj), readTopology(obj.data))
+
+    def checkpoint(self):
+        '''Writer states of every object, see FrameCacheWriter.checkpoint'''
+        return {obj.name: self.writers[obj.name].checkpoint() for obj in self.objects}
+
+    def close(self):
+        for obj in self.objects:
+            index = self.writers[obj.name].close()
+            obj.umogCacheDirectory = self.directories[obj.name]
+
+            ratio = index["rawBytes"] / max(index["storedBytes"], 1)
+            print("[GrowthNodes] Frame cache of " + obj.name + ": " + str(index["frameCount"]) +
+                  " frames, " + "{:.1f}".format(index["storedBytes"] / 1024 ** 2) + " MB, " +
+                  "compression " + "{:.1f}".format(ratio) + ":1")
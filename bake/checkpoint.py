@@ -0,0 +1,331 @@
+import os
+import bpy
+import glob
+import json
+import queue
+import pickle
+import shutil
+import threading
+import traceback
+import numpy as np
+from ..mesh import weights
+from ..mesh.arrays import (readVertexCoordinates, writeShapeKeyCoordinates,
+                           readVertexGroupWeights, writeVertexGroupWeights)
+from .topology import readTopology, getTopologyHash, applyTopology
+
+# Checkpoints of long bakes.
+#
+# Every CheckpointInterval frames the bake loop captures the state needed to
+# continue after the frame: the meshes of the output objects, the texture
+# arrays and execution_scratch of the reference holder, the in-memory
+# vertex group weights and the scalar values of the runtime sockets.
+# Capturing copies the data into numpy arrays and pickled bytes on the main
+# thread; a worker thread writes the files, so the frame loop doesn't wait
+# for the disk.
+#
+# A checkpoint is complete once its checkpoint_<frame>.json manifest exists.
+# Shape keys are stored incrementally: a checkpoint only writes the keys
+# added since the previous one (plus the last stored key, which nodes may
+# still have changed) and lists the key files of the earlier checkpoints.
+# When writing a checkpoint fails, the writer skips the queued checkpoints
+# that build on it and the next one starts a new chain with all keys.
+
+manifestName = "checkpoint_{:06d}.json"
+
+
+def getCheckpointDirectory(tree):
+    return bpy.path.abspath(os.path.join(tree.properties.CheckpointDirectory,
+                                         bpy.path.clean_name(tree.name)))
+
+
+def getManifestPaths(tree):
+    directory = getCheckpointDirectory(tree)
+    return sorted(glob.glob(os.path.join(directory, "checkpoint_*.json")))
+
+
+def findCheckpointFrame(tree):
+    '''Frame of the newest checkpoint of tree without loading it, None if there is none'''
+    paths = getManifestPaths(tree)
+    if len(paths) == 0:
+        return None
+    return int(os.path.basename(paths[-1])[len("checkpoint_"):-len(".json")])
+
+
+def loadLatestCheckpoint(tree):
+    '''Returns the newest complete BakeCheckpoint of tree, or None'''
+    paths = getManifestPaths(tree)
+    if len(paths) == 0:
+        return None
+    with open(paths[-1]) as manifestFile:
+        return BakeCheckpoint(os.path.dirname(paths[-1]), json.load(manifestFile))
+
+
+class BakeCheckpoint:
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self.frame = manifest["frame"]
+        self.state = None
+
+    def getProblem(self, tree):
+        '''Reason why the bake of tree can't resume from here, None if it can'''
+        props = tree.properties
+        if self.manifest["bakeTarget"] != props.BakeTarget:
+            return "The checkpoint was baked into " + self.manifest["bakeTarget"]
+        if self.frame + 1 >= props.EndFrame:
+            return "The checkpoint is at the end of the frame range"
+        missing = [name for name in self.manifest["objects"] if name not in bpy.data.objects]
+        if len(missing) > 0:
+            return "Missing objects: " + ", ".join(missing)
+        return None
+
+    def getFiles(self):
+        files = {manifestName.format(self.frame), self.manifest["state"]}
+        for entry in self.manifest["objects"].values():
+            files.add(entry["mesh"])
+            files.update(keyFile for keyFile, first in entry["keyFiles"])
+        return files
+
+    def restore(self, tree, refholder):
+        '''Restores everything except the runtime sockets, see restoreSockets'''
+        with open(os.path.join(self.directory, self.manifest["state"]), "rb") as stateFile:
+            self.state = pickle.load(stateFile)
+
+        tree.properties.bakeCount = self.manifest["bakeCount"]
+        for name, entry in self.manifest["objects"].items():
+            self.restoreObject(bpy.data.objects[name], entry)
+
+        for key, value in self.state["textures"].items():
+            setattr(refholder, key, value)
+        refholder.execution_scratch = self.state["scratch"]
+        weights.pendingWeights.update(self.state["weights"])
+
+    def restoreObject(self, obj, entry):
+        mesh = obj.data
+        with np.load(os.path.join(self.directory, entry["mesh"])) as data:
+            arrays = {key: data[key] for key in data.files}
+
+        if mesh.shape_keys is not None:
+            obj.shape_key_clear()
+
+        if getTopologyHash(readTopology(mesh)) == entry["topologyHash"]:
+            mesh.vertices.foreach_set("co", arrays["coords"].ravel())
+        else:
+            # rebuilding the geometry drops the loop and vertex layers
+            applyTopology(mesh, arrays, arrays["coords"])
+            for index, name in enumerate(entry["uvLayers"]):
+                layer = mesh.uv_layers.get(name) or mesh.uv_layers.new(name = name)
+                layer.data.foreach_set("uv", arrays["uv_{}".format(index)])
+
+        for index, name in enumerate(entry["vertexGroups"]):
+            if name not in obj.vertex_groups:
+                obj.vertex_groups.new(name = name)
+            writeVertexGroupWeights(obj, name, arrays["group_{}".format(index)])
+
+        shapeKeys = entry["shapeKeys"]
+        if len(shapeKeys) > 0:
+            keyCoords = np.empty((len(shapeKeys), len(mesh.vertices), 3), dtype = np.float32)
+            for keyFile, first in entry["keyFiles"]:
+                stored = np.load(os.path.join(self.directory, keyFile))
+                keyCoords[first:first + len(stored)] = stored
+
+            for info, coords in zip(shapeKeys, keyCoords):
+                shapeKey = obj.shape_key_add(name = info["name"], from_mix = False)
+                writeShapeKeyCoordinates(shapeKey, coords)
+                shapeKey.value = info["value"]
+
+            keyBlocks = mesh.shape_keys.key_blocks
+            for info in shapeKeys:
+                keyBlocks[info["name"]].relative_key = keyBlocks[info["relativeKey"]]
+
+            obj.hasUMOGBaked = True
+            obj.bakeCount = self.manifest["bakeCount"]
+
+        mesh.update()
+
+    def restoreSockets(self, runtime):
+        sockets = self.state["sockets"]
+        for runtimeNode in runtime.nodes:
+            values = sockets.get(runtimeNode.name)
+            if values is None:
+                continue
+            for socketList, key in ((runtimeNode.inputs, "inputs"), (runtimeNode.outputs, "outputs")):
+                for index, value, object in values[key]:
+                    if index < len(socketList):
+                        socket = socketList[index]
+                        socket.value = value
+                        socket.object = object
+                        runtime.resolve(socket)
+
+
+class BakeCheckpointer:
+    def __init__(self, tree, resume = None):
+        props = tree.properties
+        self.directory = getCheckpointDirectory(tree)
+        self.interval = props.CheckpointInterval
+        self.startFrame = props.StartFrame
+        self.objects = tree.getOutputObjects()
+        self.manifest = {"version": 1, "tree": tree.name, "bakeTarget": props.BakeTarget,
+                         "bakeCount": props.bakeCount}
+
+        # object name -> (topology hash, stored key count, [(key file, first key)])
+        self.keyChains = {}
+        if resume is None:
+            shutil.rmtree(self.directory, ignore_errors = True)
+            self.writtenFiles = set()
+        else:
+            for name, entry in resume.manifest["objects"].items():
+                self.keyChains[name] = (entry["topologyHash"], len(entry["shapeKeys"]),
+                                        [tuple(keyFile) for keyFile in entry["keyFiles"]])
+            self.writtenFiles = resume.getFiles()
+        os.makedirs(self.directory, exist_ok = True)
+
+        self.error = None
+        # checkpoints of a generation share key chains; a failed write ends it
+        self.generation = 0
+        self.failedGeneration = -1
+        # at most two checkpoints wait in memory for the writer
+        self.jobs = queue.Queue(maxsize = 2)
+        self.thread = threading.Thread(target = self.writeJobs, daemon = True)
+        self.thread.start()
+
+    def isDue(self, frame):
+        return (frame - self.startFrame + 1) % self.interval == 0
+
+    def save(self, frame, refholder, runtime, bakeCache):
+        if self.failedGeneration >= self.generation:
+            # the chains may list key files that were never written
+            self.generation += 1
+            self.keyChains = {}
+
+        try:
+            files = {}
+            chains = {}
+            manifest = dict(self.manifest, frame = frame, objects = {})
+            for obj in self.objects:
+                manifest["objects"][obj.name] = self.captureObject(obj, frame, files, chains)
+
+            if bakeCache is not None:
+                manifest["cache"] = bakeCache.checkpoint()
+
+            state = {
+                "textures": {key: getattr(refholder, key)
+                             for key in ("ntindex", "tdict", "np2dtextures", "matrices")},
+                "scratch": refholder.execution_scratch,
+                "weights": dict(weights.pendingWeights),
+                "sockets": captureSockets(runtime)}
+            manifest["state"] = "state_{:06d}.pickle".format(frame)
+            files[manifest["state"]] = pickle.dumps(state, protocol = pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # a failed checkpoint must not end the bake
+            print("[GrowthNodes] Checkpoint of frame " + str(frame) + " failed:")
+            traceback.print_exc()
+            return
+
+        # only a complete capture advances the chains
+        self.keyChains.update(chains)
+        self.jobs.put((self.generation, frame, files, manifest))
+
+    def captureObject(self, obj, frame, files, chains):
+        mesh = obj.data
+        name = bpy.path.clean_name(obj.name)
+
+        topology = readTopology(mesh)
+        topologyHash = getTopologyHash(topology)
+        arrays = dict(topology)
+        arrays["coords"] = readVertexCoordinates(mesh)
+        for index, layer in enumerate(mesh.uv_layers):
+            uvs = np.empty(len(mesh.loops) * 2, dtype = np.float32)
+            layer.data.foreach_get("uv", uvs)
+            arrays["uv_{}".format(index)] = uvs
+        for index, group in enumerate(obj.vertex_groups):
+            arrays["group_{}".format(index)] = readVertexGroupWeights(obj, group.name)
+
+        meshFile = "mesh_{}_{:06d}.npz".format(name, frame)
+        files[meshFile] = arrays
+
+        keyBlocks = mesh.shape_keys.key_blocks if mesh.shape_keys is not None else []
+        chainHash, storedKeys, keyFiles = self.keyChains.get(obj.name, (None, 0, []))
+        # other topologies change every key, fewer keys mean they were replaced
+        if chainHash != topologyHash or storedKeys > len(keyBlocks):
+            storedKeys, keyFiles = 0, []
+
+        first = max(storedKeys - 1, 0)
+        if len(keyBlocks) > first:
+            keyFile = "keys_{}_{:06d}.npy".format(name, frame)
+            files[keyFile] = np.stack([readVertexCoordinates(mesh, shapeKey)
+                                       for shapeKey in keyBlocks[first:]])
+            keyFiles = keyFiles + [(keyFile, first)]
+        chains[obj.name] = (topologyHash, len(keyBlocks), keyFiles)
+
+        return {
+            "mesh": meshFile,
+            "topologyHash": topologyHash,
+            "uvLayers": [layer.name for layer in mesh.uv_layers],
+            "vertexGroups": [group.name for group in obj.vertex_groups],
+            "shapeKeys": [{"name": shapeKey.name, "value": shapeKey.value,
+                           "relativeKey": shapeKey.relative_key.name} for shapeKey in keyBlocks],
+            "keyFiles": keyFiles}
+
+    def writeJobs(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            generation = job[0]
+            if generation <= self.failedGeneration:
+                continue
+            try:
+                self.writeCheckpoint(*job[1:])
+            except Exception as error:
+                self.error = error
+                self.failedGeneration = generation
+                traceback.print_exc()
+
+    def writeCheckpoint(self, frame, files, manifest):
+        for fileName, data in files.items():
+            path = os.path.join(self.directory, fileName)
+            if isinstance(data, bytes):
+                with open(path, "wb") as dataFile:
+                    dataFile.write(data)
+            elif isinstance(data, dict):
+                np.savez(path, **data)
+            else:
+                np.save(path, data)
+
+        # the manifest appears last and at once, so it only lists written files
+        fileName = manifestName.format(frame)
+        temporaryPath = os.path.join(self.directory, fileName + ".tmp")
+        with open(temporaryPath, "w") as manifestFile:
+            json.dump(manifest, manifestFile, indent = 1)
+        os.replace(temporaryPath, os.path.join(self.directory, fileName))
+
+        checkpoint = BakeCheckpoint(self.directory, manifest)
+        files = checkpoint.getFiles()
+        for fileName in self.writtenFiles - files:
+            os.remove(os.path.join(self.directory, fileName))
+        self.writtenFiles = files
+
+    def close(self, discard = False):
+        '''Waits for the pending checkpoints; a finished bake discards them'''
+        self.jobs.put(None)
+        self.thread.join()
+        if discard:
+            shutil.rmtree(self.directory, ignore_errors = True)
+        if self.error is not None:
+            print("[GrowthNodes] Writing checkpoints failed: " + str(self.error))
+
+
+def captureSockets(runtime):
+    '''Scalar values of the runtime sockets by node name'''
+    sockets = {}
+    for runtimeNode in runtime.nodes:
+        sockets[runtimeNode.name] = {
+            "inputs": captureValues(runtimeNode.inputs),
+            "outputs": captureValues(runtimeNode.outputs)}
+    return sockets
+
+
+def captureValues(socketList):
+    return [(index, socket.value, socket.object) for index, socket in enumerate(socketList)
+            if isinstance(socket.value, (bool, int, float, str))]
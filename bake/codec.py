@@ -0,0 +1,59 @@
+import numpy as np
+
+# Encodings of the per frame position deltas of a frame cache chunk.
+#   FLOAT32:   exact float32 deltas
+#   FLOAT16:   float16 deltas
+#   QUANTIZED: int16 deltas with one scale per frame
+#   SPARSE:    (index, float32 delta) lists of the vertices that moved
+#              further than a tolerance since the last decoded frame
+#
+# Deltas are taken against the decoded previous frame, so encoding errors
+# don't accumulate; a sparse vertex is off by at most the tolerance.
+
+denseEncodings = ("FLOAT32", "FLOAT16", "QUANTIZED")
+
+
+def encodeDelta(delta, encoding):
+    '''Returns (encoded delta, scale, decoded delta)'''
+    if encoding == "FLOAT16":
+        encoded = delta.astype(np.float16)
+        return encoded, 1.0, encoded.astype(np.float32)
+    if encoding == "QUANTIZED":
+        largest = float(np.abs(delta).max()) if delta.size > 0 else 0.0
+        scale = largest / 32767 if largest > 0 else 1.0
+        encoded = np.round(delta / scale).astype(np.int16)
+        return encoded, scale, encoded.astype(np.float32) * np.float32(scale)
+    return delta.astype(np.float32), 1.0, delta.astype(np.float32)
+
+
+def encodeSparseDelta(delta, tolerance):
+    '''Returns (indices, deltas) of the vertices that moved further than tolerance'''
+    distances = np.einsum("ij,ij->i", delta, delta)
+    indices = np.flatnonzero(distances > tolerance * tolerance).astype(np.int32)
+    return indices, delta[indices].astype(np.float32)
+
+
+def packDeltas(encoding, deltas, scales, shape):
+    '''Returns the arrays a chunk stores for its deltas'''
+    if encoding == "SPARSE":
+        counts = [len(indices) for indices, values in deltas]
+        return {
+            "offsets": np.concatenate(([0], np.cumsum(counts, dtype = np.int64))),
+            "indices": np.concatenate([indices for indices, values in deltas] or
+                                      [np.zeros(0, dtype = np.int32)]),
+            "values": np.concatenate([values for indices, values in deltas] or
+                                     [np.zeros((0, 3), dtype = np.float32)])}
+
+    deltaType = np.float32 if len(deltas) == 0 else deltas[0].dtype
+    return {
+        "deltas": np.array(deltas, dtype = deltaType).reshape((-1,) + shape),
+        "scales": np.array(scales, dtype = np.float32)}
+
+
+def applyDelta(arrays, index, coords):
+    '''Adds the delta of the frame after index to coords (in place)'''
+    if "offsets" in arrays:
+        start, end = int(arrays["offsets"][index]), int(arrays["offsets"][index + 1])
+        coords[arrays["indices"][start:end]] += arrays["values"][start:end]
+    else:
+        coords += arrays["deltas"][index].astype(np.float32) * np.float32(arrays["scales"][index])
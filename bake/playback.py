@@ -0,0 +1,110 @@
+import os
+import bpy
+import numpy as np
+from collections import OrderedDict
+from .cache import FrameCacheReader, cacheReaders, indexFileName
+from .codec import applyDelta
+from .topology import matchesTopology, applyTopology
+from ..preferences import getPlaybackSettings
+
+# Playback of frame caches on frame changes.
+#
+# Chunks are memory-mapped (or loaded once when compressed) and frames are
+# only decoded when they are shown. Decoded frames are kept in an LRU that
+# is limited by the memory budget of the addon preferences. A frame is
+# decoded from the closest earlier decoded frame of its chunk, so stepping
+# through the timeline only adds one delta per frame.
+
+
+class FramePlayback(FrameCacheReader):
+    def __init__(self, directory, memoryBudget = 512 * 1024 ** 2):
+        super().__init__(directory)
+        self.memoryBudget = memoryBudget
+        # (chunk file, position) -> decoded positions
+        self.decodedFrames = OrderedDict()
+        self.decodedBytes = 0
+        # object name -> topology index last written to its mesh
+        self.appliedTopologies = {}
+
+    def read(self, frame):
+        if len(self.chunks) == 0:
+            return None
+
+        chunk, position, storedFrame = self.locate(frame)
+        key = (chunk["file"], position)
+        coords = self.decodedFrames.get(key)
+        if coords is not None:
+            self.decodedFrames.move_to_end(key)
+            return coords
+
+        coords = self.decode(chunk, position)
+        self.remember(key, coords)
+        return coords
+
+    def decode(self, chunk, position):
+        arrays = self.loadChunk(chunk)
+
+        start = 0
+        coords = None
+        for earlier in range(position - 1, -1, -1):
+            cached = self.decodedFrames.get((chunk["file"], earlier))
+            if cached is not None:
+                start = earlier + 1
+                coords = cached.copy()
+                break
+
+        if coords is None:
+            coords = np.array(arrays["keyframe"], dtype = np.float32)
+        for index in range(start, position + 1):
+            if index > 0:
+                applyDelta(arrays, index - 1, coords)
+        return coords
+
+    def remember(self, key, coords):
+        if coords.nbytes > self.memoryBudget:
+            return
+        self.decodedFrames[key] = coords
+        self.decodedBytes += coords.nbytes
+        while self.decodedBytes > self.memoryBudget:
+            _, evicted = self.decodedFrames.popitem(last = False)
+            self.decodedBytes -= evicted.nbytes
+
+
+def getCacheReader(directory):
+    reader = cacheReaders.get(directory)
+    if reader is None:
+        if not os.path.isfile(os.path.join(directory, indexFileName)):
+            return None
+        reader = FramePlayback(directory)
+        cacheReaders[directory] = reader
+    return reader
+
+
+def loadCachedFrame(obj, frame):
+    '''Writes the cached positions of frame to the mesh of obj'''
+    reader = getCacheReader(bpy.path.abspath(obj.umogCacheDirectory))
+    if reader is None:
+        return
+
+    reader.memoryBudget = getPlaybackSettings().memoryBudget * 1024 ** 2
+    coords = reader.read(frame)
+    if coords is None:
+        return
+
+    mesh = obj.data
+    chunk = reader.findChunk(frame)
+    topology = reader.loadTopology(chunk)
+
+    # the mesh is only rebuilt when the frame has another topology
+    if topology is not None:
+        index = chunk["topology"]
+        if reader.appliedTopologies.get(obj.name) != index or not matchesTopology(mesh, topology):
+            applyTopology(mesh, topology, coords)
+            reader.appliedTopologies[obj.name] = index
+            return
+
+    if len(coords) != len(mesh.vertices):
+        return
+
+    mesh.vertices.foreach_set("co", coords.ravel())
+    mesh.update()
@@ -0,0 +1,53 @@
+import time
+
+# tree name -> BakeProgress of the bakes running in a modal operator
+activeBakes = {}
+
+
+class BakeProgress:
+    def __init__(self, startFrame, endFrame):
+        self.startFrame = startFrame
+        self.endFrame = endFrame
+        self.frame = startFrame - 1
+        self.startTime = time.perf_counter()
+        self.cancelled = False
+
+    @property
+    def totalFrames(self):
+        return self.endFrame - self.startFrame
+
+    @property
+    def bakedFrames(self):
+        return self.frame - self.startFrame + 1
+
+    @property
+    def fraction(self):
+        return self.bakedFrames / max(self.totalFrames, 1)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.startTime
+
+    @property
+    def remaining(self):
+        '''Estimated seconds left, None before the first frame is baked'''
+        if self.bakedFrames <= 0:
+            return None
+        return self.elapsed / self.bakedFrames * (self.totalFrames - self.bakedFrames)
+
+    def update(self, frame):
+        self.frame = frame
+
+    def getStatus(self):
+        status = "Frame {} / {} ({:.0f}%)".format(self.bakedFrames, self.totalFrames, self.fraction * 100)
+        if self.remaining is not None:
+            status += "  ETA " + formatDuration(self.remaining)
+        return status
+
+
+def formatDuration(seconds):
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours > 0:
+        return "{}:{:02d}:{:02d}".format(hours, minutes, seconds)
+    return "{}:{:02d}".format(minutes, seconds)
@@ -0,0 +1,47 @@
+import hashlib
+import numpy as np
+from ..mesh.arrays import readPolygonLoops
+
+# Mesh topology as flat arrays, stored by the frame cache whenever nodes
+# like Subdivide or Dissolve changed it during a bake.
+
+topologyArrays = ("loopVertices", "loopStarts", "loopTotals")
+
+
+def readTopology(mesh):
+    loopVertices, loopStarts, loopTotals = readPolygonLoops(mesh)
+    return {
+        "vertexCount": np.array(len(mesh.vertices), dtype = np.int64),
+        "loopVertices": loopVertices,
+        "loopStarts": loopStarts,
+        "loopTotals": loopTotals}
+
+
+def getTopologyHash(topology):
+    digest = hashlib.sha1()
+    digest.update(topology["vertexCount"].tobytes())
+    for key in topologyArrays:
+        digest.update(np.ascontiguousarray(topology[key]).tobytes())
+    return digest.hexdigest()
+
+
+def matchesTopology(mesh, topology):
+    '''Cheap check whether the element counts of mesh fit the topology'''
+    return (len(mesh.vertices) == int(topology["vertexCount"]) and
+            len(mesh.loops) == len(topology["loopVertices"]) and
+            len(mesh.polygons) == len(topology["loopStarts"]))
+
+
+def applyTopology(mesh, topology, coords):
+    '''Rebuilds the geometry of mesh; edges are recalculated from the polygons'''
+    mesh.clear_geometry()
+    mesh.vertices.add(int(topology["vertexCount"]))
+    mesh.loops.add(len(topology["loopVertices"]))
+    mesh.polygons.add(len(topology["loopStarts"]))
+
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(coords, dtype = np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", np.ascontiguousarray(topology["loopVertices"], dtype = np.int32))
+    mesh.polygons.foreach_set("loop_start", np.ascontiguousarray(topology["loopStarts"], dtype = np.int32))
+    mesh.polygons.foreach_set("loop_total", np.ascontiguousarray(topology["loopTotals"], dtype = np.int32))
+
+    mesh.update(calc_edges = True)
@@ -48,6 +48,15 @@ class UMOGNode:
     # can be "NONE", "ALWAYS" or "HIDDEN_ONLY"
     dynamicLabelType = "NONE"
 
+    # True if runtimeRefresh computes the outputs from the bake snapshot
+    # without touching the RNA sockets
+    hasRuntimeRefresh = False
+    # False if runtimeExecute only reads the snapshot sockets, so the
+    # snapshot values don't have to be written to the RNA sockets first
+    executeReadsSockets = True
+    # True if the output values never change during a bake
+    hasConstantOutputs = False
+
     @classmethod
     def poll(cls, nodeTree):
         return nodeTree.bl_idname == "umog_UMOGNodeTree"
@@ -77,14 +86,30 @@ class UMOGNode:
         self.draw(layout)
 
     def refreshInputs(self):
+        '''Returns True if the value of any input changed'''
+        inputsChanged = False
         for socket in self.inputs:
-            socket.refreshSocket()
-
-    def refreshNode(self):
-        self.refreshInputs()
+            if socket.refreshSocket():
+                inputsChanged = True
+        return inputsChanged
+
+    def refreshNode(self, onlyIfChanged = False):
+        '''
+        Returns True if the value of any output changed.
+        With onlyIfChanged the node is skipped when none of its inputs changed.
+        '''
+        inputsChanged = self.refreshInputs()
+        if onlyIfChanged and not inputsChanged:
+            return False
+
+        outputsBefore = self.getOutputValues()
         self.preRefresh()
         self.refresh()
         self.postRefresh()
+        return self.getOutputValues() != outputsBefore
+
+    def getOutputValues(self):
+        return [socket.getComparableValue() for socket in self.outputs]
 
     def refreshOnFrameChange(self):
         pass
@@ -149,6 +174,20 @@ class UMOGNode:
     def postBake(self, refholder):
         pass
 
+    # bake snapshot counterparts of refresh and execute
+    # inputs and outputs are lists of RuntimeSocket records
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        pass
+
+    def runtimeExecute(self, inputs, outputs, runtime):
+        self.execute(runtime.refholder)
+
+    # Python expression equivalent to runtimeRefresh, e.g. "({0} + {1})"
+    # the fields are replaced with the input values; nodes returning an
+    # expression are fused into one function by the scalar compiler
+    def getRuntimeExpression(self):
+        return None
+
     def socketMoved(self):
         self.socketChanged()
 
@@ -235,6 +274,11 @@ class UMOGNode:
     def sockets(self):
         return list(self.inputs) + list(self.outputs)
 
+    @property
+    def hasReferenceSockets(self):
+        '''True if the node has sockets listed in the texture/object panels'''
+        return any(socket.dataType in ("Texture2", "Object") for socket in self.sockets)
+
     def newInput(self, type, name, identifier = None, alternativeIdentifier = None,
                  **kwargs):
         idName = toSocketIdName(type)
@@ -7,6 +7,7 @@ from ... utils.names import getRandomString, toVariableName
 from ... operators.dynamic_operators import getInvokeFunctionOperator
 from ... utils.events import propUpdate
 from ... utils.debug import *
+from ... utils.trace import tracer
 
 
 class SocketTextProperties(bpy.types.PropertyGroup):
@@ -88,29 +89,34 @@ class UMOGSocket:
     # Refresh and free 
     ##########################################################
     def refreshSocket(self):
+        '''Returns True if the value of this socket changed'''
+        valueChanged = False
         if self.isRefreshable and not (self.isPacked and self.nodeTree.executeInProgress):
             if self.isInput and self.isLinked:
                 fromSocket = self.getFromSocket
                 fromSocketAllowed = fromSocket.dataType in self.allowedInputTypes
                 allSocketsAllowed = "All" in self.allowedInputTypes
                 if allSocketsAllowed or fromSocketAllowed:
-                    self.socketRecentlyRefreshed = True
-                    beforeValue = self.getProperty()
-                    afterValue = self.getFromSocket.getProperty()
-                    self.setProperty(self.getFromSocket.getProperty())
+                    beforeValue = self.getComparableValue()
+                    # Skip the property write (and its update callback) if
+                    # the linked value is already stored in this socket
+                    if fromSocket.getComparableValue() != beforeValue:
+                        self.socketRecentlyRefreshed = True
+                        self.setProperty(fromSocket.getProperty())
+                    afterValue = self.getComparableValue()
+                    valueChanged = afterValue != beforeValue
                     self.refresh()
+
+                    if tracer.enabled:
+                        tracer.record("refreshSocket", self.node.name, self.identifier,
+                                      arguments = (self.dataType, beforeValue, afterValue))
                 else:
                     self.reverseName()
 
-                DBG("SOCKET SUCCESSFULLY REFRESHED:",
-                    "Type:   " + self.dataType,
-                    "Name:   " + self.name,
-                    "Path:   " + self.path_from_id(),
-                    "Before: " + str(beforeValue),
-                    "After:  " + str(afterValue),
-                    trace=True)
             if self.isInput and self.isUnlinked:
                 self.reverseName()
+
+        return valueChanged
                 
     def freeSocket(self):
         self.destroy()
@@ -136,6 +142,17 @@ class UMOGSocket:
     def getProperty(self):
         return
 
+    def getComparableValue(self):
+        '''Value used to detect changes while refreshing the node tree'''
+        return self.getProperty()
+
+    def getRuntimeConverter(self):
+        '''Function applied to linked values inside the bake runtime snapshot'''
+        return lambda data: data
+
+    def setRuntimeProperty(self, value, object):
+        self.setProperty(value)
+
     @classmethod
     def getDefaultValue(cls):
         raise NotImplementedError(
@@ -0,0 +1,173 @@
+import numpy as np
+
+# Bulk access to mesh data. Everything is read and written with
+# foreach_get/foreach_set into float32/int32 arrays, so the cost of a call
+# only depends on the size of the mesh and not on Python loops.
+
+
+def readVertexCoordinates(mesh, shapeKey = None):
+    '''Returns the (vertices, 3) coordinates of the mesh or of a shape key'''
+    source = mesh.vertices if shapeKey is None else shapeKey.data
+    coords = np.empty(len(mesh.vertices) * 3, dtype = np.float32)
+    source.foreach_get("co", coords)
+    return coords.reshape(-1, 3)
+
+
+def readShapeCoordinates(obj):
+    '''Coordinates of the last shape key (the result baked so far) or of the vertices'''
+    shapeKeys = obj.data.shape_keys
+    if shapeKeys is None:
+        return readVertexCoordinates(obj.data)
+    return readVertexCoordinates(obj.data, shapeKeys.key_blocks[-1])
+
+
+def writeShapeKeyCoordinates(shapeKey, coords):
+    shapeKey.data.foreach_set("co", np.ascontiguousarray(coords, dtype = np.float32).ravel())
+
+
+def readPolygonLoops(mesh):
+    '''Returns (loop vertex indices, polygon loop starts, polygon loop totals)'''
+    loopVertices = np.empty(len(mesh.loops), dtype = np.int32)
+    mesh.loops.foreach_get("vertex_index", loopVertices)
+
+    loopStarts = np.empty(len(mesh.polygons), dtype = np.int32)
+    mesh.polygons.foreach_get("loop_start", loopStarts)
+    loopTotals = np.empty(len(mesh.polygons), dtype = np.int32)
+    mesh.polygons.foreach_get("loop_total", loopTotals)
+
+    return loopVertices, loopStarts, loopTotals
+
+
+def readPolygonNormals(mesh):
+    normals = np.empty(len(mesh.polygons) * 3, dtype = np.float32)
+    mesh.polygons.foreach_get("normal", normals)
+    return normals.reshape(-1, 3)
+
+
+def readShapePolygonNormals(obj, loopVertices, loopStarts, loopTotals):
+    '''Polygon normals of the shape edit mode would show (the last shape key)'''
+    if obj.data.shape_keys is None:
+        return readPolygonNormals(obj.data)
+    coords = readShapeCoordinates(obj)
+    return calculatePolygonNormals(coords, loopVertices, loopStarts, loopTotals)
+
+
+def readLoopEdges(mesh):
+    loopEdges = np.empty(len(mesh.loops), dtype = np.int32)
+    mesh.loops.foreach_get("edge_index", loopEdges)
+    return loopEdges
+
+
+def findManifoldEdgeFaces(loopEdges, loopTotals, edgeCount):
+    '''
+    Returns (edges, first polygons, second polygons) for every edge shared by
+    exactly two polygons. Boundary and non-manifold edges are skipped.
+    '''
+    loopPolygons = np.repeat(np.arange(len(loopTotals), dtype = np.int32), loopTotals)
+    order = np.argsort(loopEdges, kind = "stable")
+    sortedPolygons = loopPolygons[order]
+
+    counts = np.bincount(loopEdges, minlength = edgeCount)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    edges = np.flatnonzero(counts == 2)
+    return edges, sortedPolygons[starts[edges]], sortedPolygons[starts[edges] + 1]
+
+
+def calculateDihedralAngles(polygonNormals, firstPolygons, secondPolygons):
+    '''Angles in radians between the normals of polygon pairs'''
+    first = polygonNormals[firstPolygons]
+    second = polygonNormals[secondPolygons]
+    lengths = np.linalg.norm(first, axis = 1) * np.linalg.norm(second, axis = 1)
+    dots = np.einsum("ij,ij->i", first, second)
+    cosines = np.divide(dots, lengths, out = np.ones_like(lengths), where = lengths > 0)
+    return np.arccos(np.clip(cosines, -1, 1))
+
+
+def calculatePolygonNormals(coords, loopVertices, loopStarts, loopTotals):
+    '''
+    Unnormalized polygon normals (Newell's method). Their length is twice
+    the polygon area, which gives area weighted vertex normals when summed.
+    '''
+    if len(loopStarts) == 0:
+        return np.zeros((0, 3), dtype = np.float32)
+
+    nextLoops = np.arange(1, len(loopVertices) + 1)
+    nextLoops[loopStarts + loopTotals - 1] = loopStarts
+
+    crosses = np.cross(coords[loopVertices], coords[loopVertices[nextLoops]])
+    # the loops of a polygon are stored next to each other
+    return np.add.reduceat(crosses, loopStarts, axis = 0)
+
+
+def calculateVertexNormals(coords, loopVertices, loopStarts, loopTotals):
+    '''Returns normalized, area weighted (vertices, 3) vertex normals'''
+    polygonNormals = calculatePolygonNormals(coords, loopVertices, loopStarts, loopTotals)
+    loopNormals = np.repeat(polygonNormals, loopTotals, axis = 0)
+
+    normals = np.empty((len(coords), 3), dtype = np.float32)
+    for axis in range(3):
+        normals[:, axis] = np.bincount(loopVertices, weights = loopNormals[:, axis],
+                                       minlength = len(coords))
+
+    lengths = np.linalg.norm(normals, axis = 1)
+    # loose vertices keep a zero normal and are not displaced
+    np.divide(normals, lengths[:, None], out = normals, where = lengths[:, None] > 0)
+    return normals
+
+
+def readVertexUVs(mesh, loopVertices):
+    '''Per vertex average of the active UV layer, None if the mesh has no UVs'''
+    layer = mesh.uv_layers.active
+    if layer is None:
+        return None
+
+    loopUVs = np.empty(len(mesh.loops) * 2, dtype = np.float32)
+    layer.data.foreach_get("uv", loopUVs)
+    loopUVs = loopUVs.reshape(-1, 2)
+
+    vertexCount = len(mesh.vertices)
+    counts = np.bincount(loopVertices, minlength = vertexCount)
+    uvs = np.zeros((vertexCount, 2), dtype = np.float32)
+    for axis in range(2):
+        uvs[:, axis] = np.bincount(loopVertices, weights = loopUVs[:, axis],
+                                   minlength = vertexCount)
+    np.divide(uvs, counts[:, None], out = uvs, where = counts[:, None] > 0)
+    return uvs
+
+
+def readVertexGroupWeights(obj, name):
+    '''
+    Returns the weights of a vertex group for every vertex (0 if unassigned).
+    Vertex group memberships have no foreach accessor, so this is the only
+    per-vertex Python loop of the module.
+    '''
+    index = obj.vertex_groups[name].index
+    weights = np.zeros(len(obj.data.vertices), dtype = np.float32)
+    for vertex in obj.data.vertices:
+        for element in vertex.groups:
+            if element.group == index:
+                weights[vertex.index] = element.weight
+    return weights
+
+
+def polygonMaskToVertexMask(polygonMask, loopVertices, loopTotals, vertexCount):
+    '''Marks every vertex used by at least one marked polygon'''
+    vertexMask = np.zeros(vertexCount, dtype = bool)
+    vertexMask[loopVertices[np.repeat(polygonMask, loopTotals)]] = True
+    return vertexMask
+
+
+def writeVertexGroupWeights(obj, name, weights):
+    '''
+    Replaces the content of a vertex group with per vertex weights; vertices
+    with a zero weight are removed from the group. Vertices are added in one
+    call per distinct weight, so uniform weights need a single call.
+    '''
+    group = obj.vertex_groups[name]
+    group.remove(list(range(len(weights))))
+
+    assigned = np.flatnonzero(weights)
+    values, inverse = np.unique(weights[assigned], return_inverse = True)
+    for index, value in enumerate(values):
+        group.add(assigned[inverse == index].tolist(), float(value), 'REPLACE')
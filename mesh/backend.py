@@ -0,0 +1,40 @@
+import bpy
+from .arrays import readVertexCoordinates
+
+# Mesh operations that used to go through bpy.ops.
+#
+# Operators need a window/area override, an active and selected object and
+# the right object mode, so they can't run in background mode and every
+# call pays for building the context. Together with the session, arrays and
+# weights modules these functions work on the mesh data directly.
+
+
+def clearCustomNormals(mesh):
+    '''Context free customdata_custom_splitnormals_clear'''
+    if mesh.has_custom_normals:
+        # zero vectors reset every loop to its automatic normal
+        mesh.normals_split_custom_set_from_vertices([(0.0, 0.0, 0.0)] * len(mesh.vertices))
+    mesh.use_auto_smooth = False
+
+
+def evaluateModifier(obj, modifier):
+    '''
+    Returns the (vertices, 3) coordinates of obj deformed by one of its
+    modifiers, like modifier_apply_as_shapekey but without applying it.
+    The other modifiers are disabled during the evaluation.
+    '''
+    others = [other for other in obj.modifiers if other != modifier and other.show_viewport]
+    for other in others:
+        other.show_viewport = False
+
+    try:
+        # updates the depsgraph for the changed modifier stack
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        evaluated = obj.evaluated_get(depsgraph)
+        coords = readVertexCoordinates(evaluated.to_mesh())
+        evaluated.to_mesh_clear()
+    finally:
+        for other in others:
+            other.show_viewport = True
+
+    return coords
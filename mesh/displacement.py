@@ -0,0 +1,52 @@
+import numpy as np
+
+# Texture displacement as array math, replacing the DISPLACE modifier.
+
+
+def sampleBilinear(pixels, u, v):
+    '''
+    Bilinear lookup of a (rows, columns, channels) array at normalized
+    coordinates. Pixel (i, j) lies at (u, v) = (j / columns, i / rows), which is
+    how Texture2 sockets pack textures. The texture repeats outside of 0..1.
+    '''
+    rows, columns = pixels.shape[:2]
+    x = np.asarray(u, dtype = np.float32) * columns
+    y = np.asarray(v, dtype = np.float32) * rows
+
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = (x - x0)[:, None]
+    fy = (y - y0)[:, None]
+
+    x0 = x0.astype(np.int64) % columns
+    y0 = y0.astype(np.int64) % rows
+    x1 = (x0 + 1) % columns
+    y1 = (y0 + 1) % rows
+
+    bottom = pixels[y0, x0] * (1 - fx) + pixels[y0, x1] * fx
+    top = pixels[y1, x0] * (1 - fx) + pixels[y1, x1] * fx
+    return bottom * (1 - fy) + top * fy
+
+
+def textureCoordinates(coords, uvs = None):
+    '''
+    Normalized texture coordinates of every vertex. Without UVs the local
+    object coordinates are used; packed textures cover -1..1 in x and y.
+    '''
+    if uvs is not None:
+        return uvs[:, 0], uvs[:, 1]
+    return (coords[:, 0] + 1) * 0.5, (coords[:, 1] + 1) * 0.5
+
+
+def sampleHeights(pixels, u, v):
+    '''Texture intensity (mean of the color channels) at every coordinate'''
+    samples = sampleBilinear(pixels, u, v)
+    return samples[:, :3].mean(axis = 1).astype(np.float32)
+
+
+def displace(coords, normals, heights, midLevel, strength, weights = None):
+    '''Moves every vertex along its normal by (height - midLevel) * strength * weight'''
+    offsets = (heights - np.float32(midLevel)) * np.float32(strength)
+    if weights is not None:
+        offsets *= weights
+    return coords + normals * offsets[:, None]
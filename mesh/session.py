@@ -0,0 +1,73 @@
+import bmesh
+from .weights import materializeObject
+
+# BMeshes shared by the geometry nodes of a frame.
+#
+# The first node that needs the mesh of an object converts it to a BMesh;
+# the nodes after it keep working on the same BMesh with bmesh.ops. The mesh
+# data is written once when the frame ends, or earlier when a node has to
+# read or write the mesh arrays itself (release).
+
+
+class MeshSession:
+    def __init__(self):
+        # object name -> (object, bmesh)
+        self.meshes = {}
+
+    def acquire(self, obj):
+        entry = self.meshes.get(obj.name)
+        if entry is None:
+            # BMesh operators interpolate the deform layer, so weights that
+            # only exist in memory have to be written to the groups first
+            materializeObject(obj)
+            bm = bmesh.new()
+            shapeKeys = obj.data.shape_keys
+            if shapeKeys is None:
+                bm.from_mesh(obj.data)
+            else:
+                # like edit mode, work on the last (baked) shape key
+                bm.from_mesh(obj.data, use_shape_key = True,
+                             shape_key_index = len(shapeKeys.key_blocks) - 1)
+            entry = (obj, bm)
+            self.meshes[obj.name] = entry
+        return entry[1]
+
+    def release(self, obj):
+        '''Write the BMesh of obj back, so its mesh data is up to date'''
+        entry = self.meshes.pop(obj.name, None)
+        if entry is not None:
+            self.writeMesh(*entry)
+
+    def writeBack(self):
+        for obj, bm in self.meshes.values():
+            self.writeMesh(obj, bm)
+        self.meshes.clear()
+
+    def discard(self):
+        for obj, bm in self.meshes.values():
+            bm.free()
+        self.meshes.clear()
+
+    def writeMesh(self, obj, bm):
+        bm.to_mesh(obj.data)
+        bm.free()
+        obj.data.update()
+
+
+def selectVertexGroup(bm, obj, groupName):
+    '''
+    Returns the (verts, edges, faces) edit mode selects for a vertex group,
+    or all elements when no group is given.
+    '''
+    if groupName == '':
+        return bm.verts[:], bm.edges[:], bm.faces[:]
+
+    deform = bm.verts.layers.deform.active
+    if groupName not in obj.vertex_groups or deform is None:
+        return [], [], []
+
+    index = obj.vertex_groups[groupName].index
+    verts = {v for v in bm.verts if index in v[deform]}
+    edges = [e for e in bm.edges if e.verts[0] in verts and e.verts[1] in verts]
+    faces = [f for f in bm.faces if all(v in verts for v in f.verts)]
+    return list(verts), edges, faces
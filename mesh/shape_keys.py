@@ -0,0 +1,54 @@
+import numpy as np
+from .arrays import readVertexCoordinates, readVertexGroupWeights
+
+# Shape key bookkeeping without removing keys one at a time.
+
+
+def readShapeKeyMix(obj):
+    '''
+    Returns the coordinates of the current shape key mix. Only keys with a
+    non zero value are read, so this stays cheap with many baked keys.
+    '''
+    mesh = obj.data
+    keyBlocks = mesh.shape_keys.key_blocks
+    basis = keyBlocks[0]
+    basisCoords = readVertexCoordinates(mesh, basis)
+    coords = basisCoords.copy()
+
+    if obj.show_only_shape_key:
+        return readVertexCoordinates(mesh, keyBlocks[obj.active_shape_key_index])
+
+    for keyBlock in keyBlocks[1:]:
+        if keyBlock.mute or keyBlock.value == 0:
+            continue
+        relative = keyBlock.relative_key
+        offset = readVertexCoordinates(mesh, keyBlock)
+        if relative == basis:
+            offset -= basisCoords
+        else:
+            offset -= readVertexCoordinates(mesh, relative)
+        offset *= keyBlock.value
+        if keyBlock.vertex_group in obj.vertex_groups:
+            offset *= readVertexGroupWeights(obj, keyBlock.vertex_group)[:, None]
+        coords += offset
+
+    return coords
+
+
+def applyShapeKeyMix(obj):
+    '''Makes the current mix the rest shape and removes all shape keys at once'''
+    coords = readShapeKeyMix(obj)
+    obj.shape_key_clear()
+    obj.data.vertices.foreach_set("co", coords.ravel())
+    obj.data.update()
+
+
+def archiveShapeKeys(obj, name):
+    '''
+    Keeps the keys of earlier bakes in a copy of the mesh; copying the mesh
+    copies its shape keys in one operation.
+    '''
+    archive = obj.data.copy()
+    archive.name = name
+    archive.use_fake_user = True
+    return archive
@@ -0,0 +1,69 @@
+import bpy
+import numpy as np
+from .arrays import readVertexGroupWeights, writeVertexGroupWeights
+
+# Vertex group weights kept in memory during a bake.
+#
+# Nodes that compute a vertex group store a float32 weight per vertex here
+# instead of writing the Blender vertex group. Consumers read the array
+# directly; the Blender group is only written (materialized) when a node
+# needs the mesh data itself, when the user asks for it or after the bake.
+
+# (object name, group name) -> float32 weights
+pendingWeights = {}
+
+
+def setWeights(objectName, groupName, weights):
+    pendingWeights[(objectName, groupName)] = np.asarray(weights, dtype = np.float32)
+
+
+def hasWeights(objectName, groupName):
+    return (objectName, groupName) in pendingWeights
+
+
+def getWeights(obj, groupName):
+    '''In-memory weights of a group, or the weights of the Blender vertex group'''
+    weights = pendingWeights.get((obj.name, groupName))
+    if weights is not None and len(weights) == len(obj.data.vertices):
+        return weights
+
+    # the topology changed since the weights were computed
+    pendingWeights.pop((obj.name, groupName), None)
+    if groupName not in obj.vertex_groups:
+        return None
+    return readVertexGroupWeights(obj, groupName)
+
+
+def getMask(obj, groupName):
+    weights = getWeights(obj, groupName)
+    return None if weights is None else weights > 0
+
+
+def materialize(obj, groupName):
+    '''Write the in-memory weights to the Blender vertex group'''
+    weights = pendingWeights.pop((obj.name, groupName), None)
+    if weights is None or len(weights) != len(obj.data.vertices):
+        return
+
+    if groupName not in obj.vertex_groups:
+        obj.vertex_groups.new(name = groupName)
+    writeVertexGroupWeights(obj, groupName, weights)
+
+
+def materializeObject(obj):
+    for objectName, groupName in list(pendingWeights):
+        if objectName == obj.name:
+            materialize(obj, groupName)
+
+
+def materializeAll():
+    '''Writes every pending group to its object and forgets the rest'''
+    for objectName, groupName in list(pendingWeights):
+        obj = bpy.data.objects.get(objectName)
+        if obj is not None:
+            materialize(obj, groupName)
+    discardWeights()
+
+
+def discardWeights():
+    pendingWeights.clear()
@@ -0,0 +1,138 @@
+from collections import defaultdict, deque
+
+# Plans are cached per node tree (keyed by the tree's pointer) instead of
+# living on the NodeTree class, where they would be shared by every tree.
+executionPlanPerTree = {}
+
+
+def getStructureKey(tree):
+    '''
+    Cheap fingerprint of the tree structure. It only changes when nodes or
+    links are added or removed (or when undo reallocates the tree data).
+    '''
+    nodeKey = tuple(node.as_pointer() for node in tree.nodes)
+    linkKey = tuple((link.from_socket.as_pointer(), link.to_socket.as_pointer())
+                    for link in tree.links)
+    return hash((nodeKey, linkKey))
+
+
+def getExecutionPlan(tree):
+    treeKey = tree.as_pointer()
+    structureKey = getStructureKey(tree)
+    plan = executionPlanPerTree.get(treeKey)
+
+    if plan is None:
+        plan = ExecutionPlan(tree, structureKey, version = 1)
+        executionPlanPerTree[treeKey] = plan
+    elif plan.structureKey != structureKey:
+        plan = ExecutionPlan(tree, structureKey, version = plan.version + 1)
+        executionPlanPerTree[treeKey] = plan
+
+    return plan
+
+
+def getCachedExecutionPlan(tree):
+    '''Returns the last compiled plan without checking the tree structure'''
+    plan = executionPlanPerTree.get(tree.as_pointer())
+    if plan is None:
+        plan = getExecutionPlan(tree)
+    return plan
+
+
+def discardExecutionPlans():
+    executionPlanPerTree.clear()
+
+
+class ExecutionPlan:
+    '''
+    Compiled, read-only view of a node tree:
+      linearizedNodes: linked nodes in topological order
+      unlinkedNodes:   nodes without any link
+      componentOf:     node key -> connected component id (-1 when unlinked)
+      downstream:      node key -> keys of nodes fed by it
+      upstream:        node key -> keys of nodes feeding it
+
+    Nodes are keyed by their pointer so renaming a node keeps the plan valid.
+    '''
+
+    def __init__(self, tree, structureKey, version):
+        self.structureKey = structureKey
+        self.version = version
+        # set by the tree once node colors and components were written back
+        self.isApplied = False
+
+        self.nodeByKey = {node.as_pointer(): node for node in tree.nodes}
+        self.downstream = defaultdict(list)
+        self.upstream = defaultdict(list)
+
+        for link in tree.links:
+            fromKey = link.from_node.as_pointer()
+            toKey = link.to_node.as_pointer()
+            self.downstream[fromKey].append(toKey)
+            self.upstream[toKey].append(fromKey)
+
+        linkedKeys = [key for key in self.nodeByKey
+                      if key in self.downstream or key in self.upstream]
+
+        self.unlinkedNodes = [node for key, node in self.nodeByKey.items()
+                              if key not in self.downstream and key not in self.upstream]
+
+        self.componentOf = self.findConnectedComponents(linkedKeys)
+        self.connectedComponents = max(self.componentOf.values(), default = 0) + 1
+
+        order = self.sortTopologically(linkedKeys)
+        self.linearizedNodes = [self.nodeByKey[key] for key in order]
+        self.indexOf = {key: index for index, key in enumerate(order)}
+
+    def findConnectedComponents(self, linkedKeys):
+        componentOf = {key: -1 for key in self.nodeByKey}
+        component = 1
+
+        for start in linkedKeys:
+            if componentOf[start] != -1:
+                continue
+            componentOf[start] = component
+            stack = [start]
+            while stack:
+                key = stack.pop()
+                for adjacent in self.downstream[key] + self.upstream[key]:
+                    if componentOf[adjacent] == -1:
+                        componentOf[adjacent] = component
+                        stack.append(adjacent)
+            component += 1
+
+        return componentOf
+
+    def sortTopologically(self, linkedKeys):
+        # Kahn's algorithm; ties are resolved in tree order to stay deterministic
+        inDegree = {key: len(self.upstream[key]) for key in linkedKeys}
+        queue = deque(key for key in linkedKeys if inDegree[key] == 0)
+        order = []
+
+        while queue:
+            key = queue.popleft()
+            order.append(key)
+            for adjacent in self.downstream[key]:
+                inDegree[adjacent] -= 1
+                if inDegree[adjacent] == 0:
+                    queue.append(adjacent)
+
+        # Nodes inside a cycle never reach zero in-degree; run them last
+        if len(order) < len(linkedKeys):
+            sortedKeys = set(order)
+            order.extend(key for key in linkedKeys if key not in sortedKeys)
+
+        return order
+
+    def contains(self, node):
+        return node.as_pointer() in self.indexOf
+
+    def componentOfNode(self, node):
+        return self.componentOf.get(node.as_pointer(), -1)
+
+    def nodesAfter(self, node):
+        '''Linearized nodes from node onwards that share its connected component'''
+        key = node.as_pointer()
+        component = self.componentOf[key]
+        return [other for other in self.linearizedNodes[self.indexOf[key]:]
+                if self.componentOf[other.as_pointer()] == component]
@@ -3,6 +3,16 @@ from bpy.types import NodeTree
 from bpy.props import *
 from ..utils.debug import *
 from ..utils.handlers import eventUMOGHandler
+from ..utils.profiler import getProfiler
+from ..utils.trace import tracer
+from .execution_plan import getExecutionPlan, getCachedExecutionPlan
+from .runtime import RuntimeTree
+from ..bake.cache import BakeCache
+from ..bake.checkpoint import BakeCheckpointer
+from ..texture.buffers import textureBuffers
+from ..texture.image import clearImageMirrors
+from ..preferences import getTextureSettings
+from ..mesh.weights import discardWeights, materializeAll
 from collections import defaultdict
 
 class UMOGNodeTreeProperties(bpy.types.PropertyGroup):
@@ -35,9 +45,63 @@ class UMOGNodeTreeProperties(bpy.types.PropertyGroup):
     Substeps : IntProperty(name = "Substeps", description = "Substeps", default = 1,
                             min = 1)
 
+    BakeTarget : EnumProperty(name = "Bake Target", default = "SHAPE_KEYS",
+        items = (("SHAPE_KEYS", "Shape Keys", "Store one shape key per frame in the .blend file"),
+                 ("CACHE", "Frame Cache", "Write the vertex positions of every frame to a compressed cache on disk")))
+
+    CacheDirectory : StringProperty(name = "Cache Directory", default = "//umog_cache",
+                                    subtype = "DIR_PATH",
+                                    description = "Directory of the frame cache, one folder per tree and object")
+
+    CacheEncoding : EnumProperty(name = "Cache Encoding", default = "FLOAT16",
+        items = (("FLOAT32", "Float32", "Exact deltas to the previous frame"),
+                 ("FLOAT16", "Float16", "Half precision deltas to the previous frame"),
+                 ("QUANTIZED", "Quantized", "16 bit integer deltas with one scale per frame"),
+                 ("SPARSE", "Sparse", "Only store the vertices that moved further than the tolerance")))
+
+    CacheTolerance : FloatProperty(name = "Tolerance", default = 0.00001, min = 0.0,
+                                   precision = 6,
+                                   description = "Vertices that moved less since the last stored position are not stored")
+
+    CacheChunkSize : IntProperty(name = "Chunk Size", default = 32, min = 1,
+                                 description = "Frames stored per cache file")
+
+    CacheCompress : BoolProperty(name = "Compress Cache", default = True,
+                                 description = "Compress the cache files; uncompressed caches are memory-mapped during playback")
+
+    FuseScalarNodes : BoolProperty(name = "Fuse Scalar Nodes", default = True,
+                                   description = "Compile connected math, compare and alternator nodes into one function per bake")
+
+    CheckpointInterval : IntProperty(name = "Checkpoint Interval", default = 0, min = 0,
+                                     description = "Frames between checkpoints a bake can be resumed from (0 disables checkpoints)")
+
+    CheckpointDirectory : StringProperty(name = "Checkpoint Directory", default = "//umog_checkpoints",
+                                         subtype = "DIR_PATH",
+                                         description = "Directory of the bake checkpoints, one folder per tree")
+
+    FramesPerTick : IntProperty(name = "Frames per Tick", default = 1, min = 1,
+                                description = "Frames baked before the interface is updated again")
+
+    ProfileBake : BoolProperty(name = "Profile Bake", default = False,
+                               description = "Time every node in every bake phase")
+
     TextureResolution : IntProperty(name = "Texture Resolution",
                                     description = "Base resolution for saving and creating new textures", default = 256,
                                     min = 64, update = updateTimeInfo)
+
+    TextureWorkers : IntProperty(name = "Texture Workers", default = 0, min = 0, max = 64,
+                                 description = "Background Blender processes evaluating large procedural textures, 0 evaluates them here")
+
+    ImageFilter : EnumProperty(name = "Image Filter", default = "NEAREST",
+        description = "Resampling of image textures to the texture resolution",
+        items = (("NEAREST", "Nearest", "Use the closest source pixel"),
+                 ("BILINEAR", "Bilinear", "Interpolate between the four closest source pixels"),
+                 ("BOX", "Box", "Average the covered source pixels when downsampling")))
+
+    TexturePrecision : EnumProperty(name = "Texture Precision", default = "FLOAT32",
+        description = "Precision of the textures packed for a bake",
+        items = (("FLOAT32", "Float32", "Single precision pixels"),
+                 ("FLOAT16", "Float16", "Half precision pixels, half the memory")))
     
     ShowFrameSettings : BoolProperty(name="Toggle Frame Settings", default = True)
 
@@ -66,10 +130,6 @@ class UMOGNodeTree(NodeTree):
     bl_label = "GrowthNodes"
     bl_icon = "FORCE_TURBULENCE"
 
-    linearizedNodes = []
-    unlinkedNodes = []
-    connectedComponents = 0
-
     updateInProgress : BoolProperty(name = "Is an update in progress?", default = False)
 
     executeInProgress : BoolProperty(name = "Is an execution in progress?",
@@ -82,9 +142,27 @@ class UMOGNodeTree(NodeTree):
     def props(self):
         return self.properties
 
+    @property
+    def executionPlan(self):
+        return getCachedExecutionPlan(self)
+
+    @property
+    def linearizedNodes(self):
+        return self.executionPlan.linearizedNodes
+
+    @property
+    def unlinkedNodes(self):
+        return self.executionPlan.unlinkedNodes
+
+    @property
+    def connectedComponents(self):
+        return self.executionPlan.connectedComponents
+
     def update(self):
-        self.refreshExecutionPolicy()
-        self.updateFrom()
+        # Property edits reach updateFrom(node) through propUpdate; a full
+        # refresh is only needed when the structure of the tree changed
+        if self.refreshExecutionPolicy():
+            self.updateFrom()
 
     def updateOnFrameChange(self):
         for node in self.nodes:
@@ -93,32 +171,51 @@ class UMOGNodeTree(NodeTree):
     def updateFrom(self, node = None):
         if not self.updateInProgress:
             self.updateInProgress = True
+            start = tracer.now()
 
             if node is None:
                 for node in self.linearizedNodes:
                     node.refreshNode()
 
-                if len(self.linearizedNodes) > 0:
-                    DBG("ALL EXECUTABLE NODES REFRESHED:", *self.linearizedNodes,
-                        TRACE = False)
+                if tracer.enabled and len(self.linearizedNodes) > 0:
+                    tracer.record("updateFrom", self.name, None, start, tracer.now() - start,
+                                  arguments = tuple(node.name for node in self.linearizedNodes))
+
+                self.updateInProgress = False
+                self.populateReferences()
             else:
-                index = self.linearizedNodes.index(node)
-                currentCC = node.execution.connectedComponent
-                nodesToBeUpdated = []
-                for node in self.linearizedNodes[index:]:
-                    if node.execution.connectedComponent == currentCC:
-                        nodesToBeUpdated.append(node)
-
-                if len(self.linearizedNodes) > 0:
-                    DBG("FOLLOWING EXECUTABLE NODES REFRESHED:", *nodesToBeUpdated,
-                        TRACE = False)
-
-                for node in nodesToBeUpdated:
-                    node.refreshNode()
+                refreshedNodes = self.refreshDirtyNodes(node)
+
+                if tracer.enabled and len(refreshedNodes) > 0:
+                    tracer.record("updateFrom", node.name, None, start, tracer.now() - start,
+                                  arguments = tuple(node.name for node in refreshedNodes))
+
+                self.updateInProgress = False
+
+                if any(node.hasReferenceSockets for node in refreshedNodes):
+                    self.populateReferences()
+
+    def refreshDirtyNodes(self, changedNode):
+        '''
+        Refresh changedNode and propagate downstream only through nodes
+        whose outputs actually changed. Returns the refreshed nodes.
+        '''
+        plan = self.executionPlan
+        dirtyNodes = {changedNode.as_pointer()}
+        refreshedNodes = []
+
+        for node in plan.nodesAfter(changedNode):
+            key = node.as_pointer()
+            if key not in dirtyNodes:
+                continue
 
-            self.updateInProgress = False
+            outputsChanged = node.refreshNode(onlyIfChanged = node != changedNode)
+            refreshedNodes.append(node)
 
-            self.populateReferences()
+            if outputsChanged:
+                dirtyNodes.update(plan.downstream[key])
+
+        return refreshedNodes
 
     def populateReferences(self):
         self.textures.clear()
@@ -143,6 +240,18 @@ class UMOGNodeTree(NodeTree):
             item.name = object
             self.object_index = (len(self.objects)-1)
 
+    def getOutputObjects(self):
+        '''Mesh objects the output nodes of the tree write to'''
+        names = []
+        for node in self.linearizedNodes:
+            if not node._IsUMOGOutputNode:
+                continue
+            for socket in node.inputs:
+                if socket.dataType == "Object" and socket.value != "" and socket.value not in names:
+                    names.append(socket.value)
+        return [bpy.data.objects[name] for name in names
+                if name in bpy.data.objects and bpy.data.objects[name].type == 'MESH']
+
     def areLinksValid(self):
         returnVal = True
         for link in self.links:
@@ -168,58 +277,21 @@ class UMOGNodeTree(NodeTree):
         return "__" + str(temp)
 
     def refreshExecutionPolicy(self):
-        self.markUnvisited()
-        self.connectedComponent()
-        self.markUnvisited()
-        self.topologicalSort()
-        self.markUnvisited()
-        self.updateNodeColors()
-
-    def markUnvisited(self):
-        for node in self.nodes:
-            node.execution.visited = False
-
-    def topologicalSort(self):
-        del self.linearizedNodes[:]
-        del self.unlinkedNodes[:]
-
+        '''Returns True if the execution plan was recompiled'''
+        # The plan is only recompiled when nodes or links were added or removed
+        plan = getExecutionPlan(self)
+        if plan.isApplied:
+            return False
+        self.applyExecutionPlan(plan)
+        return True
+
+    def applyExecutionPlan(self, plan):
+        plan.isApplied = True
         for node in self.nodes:
-            if node.isLinked is False:
-                self.unlinkedNodes.append(node)
-            elif node.execution.visited is False:
-                self.topologicalSortUtil(node)
-
-    def topologicalSortUtil(self, node):
-        node.execution.visited = True
-
-        for socket in node.outputs:
-            connectedNodes = socket.getConnectedNodes
-            for adjacentNode in connectedNodes:
-                if adjacentNode.execution.visited == False:
-                    self.topologicalSortUtil(adjacentNode)
-
-        self.linearizedNodes.insert(0, node)
-
-    def connectedComponent(self):
-        connectedComponent = 1
-        for node in self.nodes:
-            if node.isLinked is False:
-                node.execution.connectedComponent = -1
-            elif node.execution.visited is False:
-                self.connectedComponentUtil(node, connectedComponent)
-                connectedComponent += 1
-
-        self.connectedComponents = connectedComponent
-
-    def connectedComponentUtil(self, node, connectedComponent):
-        node.execution.visited = True
-        node.execution.connectedComponent = connectedComponent
-
-        for socket in node.sockets:
-            connectedNodes = socket.getConnectedNodes
-            for adjacentNode in connectedNodes:
-                if adjacentNode.execution.visited == False:
-                    self.connectedComponentUtil(adjacentNode, connectedComponent)
+            componentID = plan.componentOfNode(node)
+            if node.execution.connectedComponent != componentID:
+                node.execution.connectedComponent = componentID
+        self.updateNodeColors()
 
     def updateNodeColors(self):
         for node in self.unlinkedNodes:
@@ -238,62 +310,139 @@ class UMOGNodeTree(NodeTree):
         bpy.ops.node.view_selected()
 
     def raisePopup(self, type, msg):
+        # there is no window to show a popup in background mode
+        if bpy.app.background:
+            print("[GrowthNodes] " + type + ": " + msg)
+            return
         bpy.ops.umog.popup('INVOKE_DEFAULT', errType = type, errMsg=msg)
 
     def raiseAndView(self, node, msg):
         self.raisePopup('ERROR', msg + " " + node.name)
         self.viewNode(node)
 
-    def execute(self, refholder, animate = False):
+    def execute(self, refholder, animate = False, checkpoint = None):
+        for frame in self.bakeFrames(refholder, checkpoint):
+            pass
+
+    def bakeFrames(self, refholder, checkpoint = None):
+        '''
+        Runs the bake one frame at a time and yields every baked frame.
+        Closing the generator between two frames cancels the bake; the frames
+        baked so far are kept and the nodes still get their postBake.
+        A BakeCheckpoint continues a bake after the frame it was taken at.
+        '''
         if self.areLinksValid():
-            self.update()
+            self.refreshExecutionPolicy()
+            self.updateFrom()
+
+            profiler = getProfiler(self)
+            textureBuffers.memoryBudget = getTextureSettings().bufferBudget * 1024 ** 2
+            # weights left over from another bake; a checkpoint restores its own
+            discardWeights()
 
             for node in self.linearizedNodes:
-                node.packSockets()
+                profiler.call("packSockets", node, node.packSockets)
                 # try: node.packSockets()
                 # except Exception as e:
                 #     self.raiseAndView(node, 'Failed to pack data for node')
                 #     return
 
             for node in self.linearizedNodes:
-                node.preExecute(refholder)
+                profiler.call("preExecute", node, node.preExecute, refholder)
                 # try: node.preExecute(refholder)
                 # except Exception as e:
                 #     self.raiseAndView(node, 'Pre-execution failed for node')
                 #     return
 
+            startFrame = self.properties.StartFrame
+            if checkpoint is not None:
+                checkpoint.restore(self, refholder)
+                startFrame = checkpoint.frame + 1
+
+            bakeCache = None
+            if self.properties.BakeTarget == "CACHE":
+                if checkpoint is None:
+                    bakeCache = BakeCache(self)
+                    # the rest shape is shown before the first baked frame
+                    bakeCache.recordFrame(startFrame - 1)
+                else:
+                    bakeCache = BakeCache(self, checkpoint.manifest["cache"])
+            else:
+                for obj in self.getOutputObjects():
+                    obj.umogCacheDirectory = ""
+
+            # Freeze the tree; the frame loop only works on this snapshot
+            runtime = RuntimeTree(self, refholder, profiler)
+            if checkpoint is not None:
+                checkpoint.restoreSockets(runtime)
+
+            checkpointer = None
+            if self.properties.CheckpointInterval > 0:
+                checkpointer = BakeCheckpointer(self, checkpoint)
+            completed = False
+
             self.executeInProgress = True
+            # Socket writes of the snapshot must not trigger tree refreshes
+            self.updateInProgress = True
 
-            for frame in range(self.properties.StartFrame, self.properties.EndFrame):
-                # Update the frame
-                scene = bpy.context.scene
-                scene.frame_set(frame)
+            try:
+                for frame in range(startFrame, self.properties.EndFrame):
+                    # Update the frame
+                    frameStart = tracer.now()
+                    scene = bpy.context.scene
+                    scene.frame_set(frame)
+                    runtime.frame = frame
+                    profiler.frame = frame
+
+                    for sub_frame in range(0, self.properties.Substeps):
+                        runtime.executeSubstep(sub_frame)
+
+                    refholder.meshSession.writeBack()
 
-                for sub_frame in range(0, self.properties.Substeps):
                     for node in self.linearizedNodes:
-                        node.refreshNode()
-                        # try: node.refreshNode()
-                        # except Exception as e:
-                        #     self.raiseAndView(node, 'Unable to refresh node')
-                        #     return
-                        
-                        node.execute(refholder)
-                        # try: node.execute(refholder)
+                        profiler.call("postFrame", node, node.postFrame, refholder)
+                        # try: node.postFrame(refholder)
                         # except Exception as e:
-                        #     self.raiseAndView(node, 'Unable to execute node')
+                        #     self.raiseAndView(node, 'Post-execution failed for node')
                         #     return
 
-                for node in self.linearizedNodes:
-                    node.postFrame(refholder)
-                    # try: node.postFrame(refholder)
-                    # except Exception as e:
-                    #     self.raiseAndView(node, 'Post-execution failed for node')
-                    #     return
-
-            self.executeInProgress = False
-
+                    if bakeCache is not None:
+                        bakeCache.recordFrame(frame)
+
+                    if checkpointer is not None and checkpointer.isDue(frame):
+                        checkpointer.save(frame, refholder, runtime, bakeCache)
+
+                    if tracer.enabled:
+                        tracer.record("bakeFrame", self.name, None, frameStart,
+                                      tracer.now() - frameStart, (frame,))
+
+                    yield frame
+
+                runtime.writeBack()
+                completed = True
+            except GeneratorExit:
+                # cancelled between two frames
+                runtime.writeBack()
+            finally:
+                # only left over if the frame loop failed
+                refholder.meshSession.discard()
+                if bakeCache is not None:
+                    bakeCache.close()
+                # cancelled and failed bakes keep their checkpoints to resume from
+                if checkpointer is not None:
+                    checkpointer.close(discard = completed)
+                # the packed textures are only needed during the bake
+                textureBuffers.releaseTree(self.name)
+                refholder.releaseTextures()
+                clearImageMirrors()
+                # in-memory weights must not outlive the bake, even a failed one
+                materializeAll()
+                self.updateInProgress = False
+                self.executeInProgress = False
+
+            profiler.frame = None
             for node in self.linearizedNodes:
-                node.postBake(refholder)
+                profiler.call("postBake", node, node.postBake, refholder)
                 # try: node.postBake(refholder)
                 # except Exception as e:
                 #     self.raiseAndView(node, 'Post-bake failed for node')
@@ -1,5 +1,9 @@
 import bpy
 import numpy as np
+from ..mesh.session import MeshSession
+from ..texture.procedural import evaluateTexture
+from ..texture.image import readImagePixels, writeImagePixels
+from ..texture.buffers import textureBuffers
 
 class UMOGReferenceHolder:
     def __init__(self):
@@ -12,6 +16,10 @@ class UMOGReferenceHolder:
         #maps the node name to a dict of node defined objects
         #store temporary objects here
         self.execution_scratch = {}
+        # BMeshes shared by the geometry nodes during a frame
+        self.meshSession = MeshSession()
+        # texture arrays borrowed from the buffer pool, see releaseTextures
+        self.borrowedTextures = []
         
     def getRefForMatrix(self, matrix):
         matrix_name = np.array2string(matrix)
@@ -31,8 +39,7 @@ class UMOGReferenceHolder:
         oldidx = self.ntindex
         self.ntindex += 1
         # setup the empty texture array
-        tr = bpy.context.scene.TextureResolution
-        self.np2dtextures[oldidx] = np.zeros((tr, tr, 4))
+        self.np2dtextures[oldidx] = self.borrowTexture()
         self.tdict[name] = oldidx
         # now fill in the values
         self.fillTexture(oldidx, name)
@@ -43,15 +50,24 @@ class UMOGReferenceHolder:
         oldidx = self.ntindex
         self.ntindex += 1
         # setup the empty texture array
-        tr = bpy.context.scene.TextureResolution
-        self.np2dtextures[oldidx] = np.zeros((tr, tr, 4))
+        self.np2dtextures[oldidx] = self.borrowTexture()
         return oldidx
 
+    def borrowTexture(self):
+        tr = bpy.context.scene.TextureResolution
+        pixels = textureBuffers.borrow((tr, tr, 4), np.float32)
+        pixels.fill(0.0)
+        self.borrowedTextures.append(pixels)
+        return pixels
+
+    def releaseTextures(self):
+        '''Gives the texture arrays back to the pool once the bake is done'''
+        for pixels in self.borrowedTextures:
+            textureBuffers.giveBack(pixels)
+        self.borrowedTextures = []
+
     def handleToImage(self, handle, image):
-        # print("shape of texture " + str(self.np2dtextures[handle].shape))
-        pixels = self.np2dtextures[handle].flatten().tolist()
-        # print(str(pixels[0:64]))
-        image.pixels = pixels
+        writeImagePixels(image, self.np2dtextures[handle])
 
         # write image use to debug textures
         # image.filepath_raw = "/bulk/Pictures/Blender_Generated/temp.png"
@@ -60,25 +76,25 @@ class UMOGReferenceHolder:
 
     #writes the pixels of the image to the numpy array of the handle
     def imageToHandle(self, image, handle):
-        self.np2dtextures[handle] = np.reshape(np.array(image.pixels[:]), 
-            (bpy.context.scene.TextureResolution, bpy.context.scene.TextureResolution, 4))
+        tr = bpy.context.scene.TextureResolution
+        pixels = readImagePixels(image, self.np2dtextures.get(handle))
+        self.np2dtextures[handle] = pixels.reshape(tr, tr, 4)
 
-    def fillTexture(self, index, name):
+    def fillTexture(self, index, name, workers = 0):
         tr = bpy.context.scene.TextureResolution
-        trh = tr / 2
+        texture = bpy.data.textures[name]
+        pixels = textureBuffers.borrow((tr, tr, 4), np.float32)
         # handle 1d textures by copying data to all channels
-        if bpy.data.textures[name].type in ['CLOUDS', 'DISTORTED_NOISE', 'MARBLE', 'MUSGRAVE',
-                                            'NOISE', 'STUCCI', 'VORONOI', 'WOOD']:
-            for i in range(0, tr):
-                for j in range(0, tr):
-                    x, y = (i - trh) / trh, (j - trh) / trh
-                    temp = bpy.data.textures[name].evaluate((x, y, 0.0))
-                    self.np2dtextures[index][i, j] = [temp[3], temp[3], temp[3], 1.0]
-        else:
-            for i in range(0, tr):
-                for j in range(0, tr):
-                    x, y = (i - trh) / trh, (j - trh) / trh
-                    self.np2dtextures[index][i, j] = bpy.data.textures[name].evaluate((x, y, 0.0))
+        intensity = texture.type in ['CLOUDS', 'DISTORTED_NOISE', 'MARBLE', 'MUSGRAVE',
+                                     'NOISE', 'STUCCI', 'VORONOI', 'WOOD']
+        evaluateTexture(texture, pixels, intensity, workers)
+
+        target = self.np2dtextures.get(index)
+        if target is None or target.shape != pixels.shape:
+            target = self.np2dtextures[index] = self.borrowTexture()
+        # the rows of the reference textures follow the x coordinate
+        np.copyto(target, pixels.transpose(1, 0, 2))
+        textureBuffers.giveBack(pixels)
 
     # used to generate intermediate or output references
     def getNewRef(self):
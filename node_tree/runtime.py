@@ -0,0 +1,200 @@
+import bpy
+from .scalar_compiler import fuseScalarSubgraphs
+
+# Plain Python snapshot of a node tree used by the bake loop.
+# Socket values are copied out of RNA once when the bake starts, the
+# frame/substep loop only reads and writes these records, and the final
+# values are written back to the node sockets when the bake ends.
+
+referenceCollections = {
+    "Object": "objects",
+    "Texture2": "textures",
+}
+
+
+class RuntimeSocket:
+    __slots__ = ("socket", "dataType", "isPacked", "isRefreshable",
+                 "value", "object", "reference", "convert",
+                 "frozenValue", "pushedValue")
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.dataType = socket.dataType
+        self.isPacked = socket.isPacked
+        self.isRefreshable = socket.isRefreshable
+        self.value = socket.getProperty()
+        self.object = getattr(socket, "object", "")
+        self.reference = None
+        self.convert = socket.getRuntimeConverter()
+        self.frozenValue = self.pushedValue = self.getComparableValue()
+
+    @property
+    def isPulled(self):
+        # Mirrors the conditions of UMOGSocket.refreshSocket during execution
+        return self.isRefreshable and not self.isPacked
+
+    def getComparableValue(self):
+        return (self.value, self.object)
+
+    def assign(self, source):
+        self.value = self.convert(source.value)
+        self.object = source.object
+        self.reference = source.reference
+
+    def push(self):
+        '''Write the runtime value to the RNA socket if it changed since the last push'''
+        comparable = self.getComparableValue()
+        if comparable != self.pushedValue:
+            self.socket.setRuntimeProperty(self.value, self.object)
+            self.pushedValue = comparable
+
+    def pull(self):
+        '''Read the value of the RNA socket back into the snapshot'''
+        self.value = self.socket.getProperty()
+        self.object = getattr(self.socket, "object", "")
+        self.pushedValue = self.getComparableValue()
+
+
+class RuntimeNode:
+    __slots__ = ("node", "name", "inputs", "outputs", "links",
+                 "hasRuntimeRefresh", "executeReadsSockets")
+
+    def __init__(self, node):
+        self.node = node
+        self.name = node.name
+        self.inputs = [RuntimeSocket(socket) for socket in node.inputs]
+        self.outputs = [RuntimeSocket(socket) for socket in node.outputs]
+        # filled by RuntimeTree: (runtime input, runtime output feeding it)
+        self.links = []
+        self.hasRuntimeRefresh = node.hasRuntimeRefresh
+        self.executeReadsSockets = node.executeReadsSockets
+
+    def pullInputs(self):
+        for target, source in self.links:
+            target.assign(source)
+
+    def pushInputs(self):
+        for socket in self.inputs:
+            socket.push()
+
+    def pushLinkedOutputs(self):
+        for target, source in self.links:
+            source.push()
+
+    def pullOutputs(self, runtime):
+        for socket in self.outputs:
+            socket.pull()
+            runtime.resolve(socket)
+
+    def run(self, runtime):
+        runtime.refreshNode(self)
+        runtime.executeNode(self)
+
+    def finish(self):
+        pass
+
+
+class RuntimeTree:
+    def __init__(self, tree, refholder, profiler = None):
+        self.tree = tree
+        self.refholder = refholder
+        self.profiler = profiler
+        self.frame = bpy.context.scene.frame_current
+        self.substep = 0
+        self.references = {}
+
+        self.nodes = [RuntimeNode(node) for node in tree.linearizedNodes]
+        self.buildLinkTable()
+
+        for runtimeNode in self.nodes:
+            for socket in runtimeNode.inputs + runtimeNode.outputs:
+                self.resolve(socket)
+
+        # steps run every substep: runtime nodes and fused scalar groups
+        if tree.properties.FuseScalarNodes:
+            self.schedule = fuseScalarSubgraphs(self)
+        else:
+            self.schedule = list(self.nodes)
+
+        # only a profiled bake pays for timing the node phases
+        if profiler is not None and profiler.isEnabled:
+            self.refreshNode = profiler.wrapNodePhase("refreshNode", self.refreshNode)
+            self.executeNode = profiler.wrapNodePhase("execute", self.executeNode)
+            self.schedule = [step if isinstance(step, RuntimeNode) else profiler.wrapStep(step)
+                             for step in self.schedule]
+
+    def buildLinkTable(self):
+        outputByPointer = {}
+        for runtimeNode in self.nodes:
+            for socket in runtimeNode.outputs:
+                outputByPointer[socket.socket.as_pointer()] = socket
+
+        for runtimeNode in self.nodes:
+            for socket in runtimeNode.inputs:
+                rnaSocket = socket.socket
+                if not socket.isPulled or not rnaSocket.is_linked:
+                    continue
+                fromSocket = rnaSocket.links[0].from_socket
+                allowed = ("All" in rnaSocket.allowedInputTypes or
+                           fromSocket.dataType in rnaSocket.allowedInputTypes)
+                source = outputByPointer.get(fromSocket.as_pointer())
+                if allowed and source is not None:
+                    runtimeNode.links.append((socket, source))
+
+    def resolve(self, socket):
+        '''Resolve the datablock referenced by a socket once per name'''
+        if socket.dataType == "VertexGroup":
+            dataType, name = "Object", socket.object
+        else:
+            dataType, name = socket.dataType, socket.value
+
+        if dataType not in referenceCollections:
+            return
+
+        key = (dataType, name)
+        if key not in self.references:
+            collection = getattr(bpy.data, referenceCollections[dataType])
+            self.references[key] = collection.get(name) if name else None
+        socket.reference = self.references[key]
+
+    def refreshNode(self, runtimeNode):
+        runtimeNode.pullInputs()
+        if runtimeNode.hasRuntimeRefresh:
+            runtimeNode.node.runtimeRefresh(runtimeNode.inputs, runtimeNode.outputs, self)
+        else:
+            # The linked values live in the snapshot, so the inputs are pushed
+            # instead of letting the node refresh them from the RNA sockets
+            node = runtimeNode.node
+            runtimeNode.pushInputs()
+            node.preRefresh()
+            node.refresh()
+            node.postRefresh()
+            runtimeNode.pullOutputs(self)
+
+    def executeNode(self, runtimeNode):
+        if runtimeNode.executeReadsSockets:
+            # execute() may read its inputs or the linked outputs upstream
+            # (getFromSocket) and set its outputs on the RNA sockets
+            runtimeNode.pushLinkedOutputs()
+            runtimeNode.pushInputs()
+            runtimeNode.node.runtimeExecute(runtimeNode.inputs, runtimeNode.outputs, self)
+            runtimeNode.pullOutputs(self)
+        else:
+            runtimeNode.node.runtimeExecute(runtimeNode.inputs, runtimeNode.outputs, self)
+
+    def executeSubstep(self, substep):
+        self.substep = substep
+        for step in self.schedule:
+            step.run(self)
+
+    def writeBack(self):
+        '''Store the final snapshot values in the node sockets'''
+        for step in self.schedule:
+            step.finish()
+
+        for runtimeNode in self.nodes:
+            for socket in runtimeNode.inputs + runtimeNode.outputs:
+                if socket.getComparableValue() != socket.frozenValue:
+                    socket.pushedValue = socket.frozenValue
+                    socket.push()
+                    socket.socket.refresh()
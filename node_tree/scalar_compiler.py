@@ -0,0 +1,277 @@
+import heapq
+import math
+from collections import defaultdict
+
+# Fuses pure scalar nodes of a RuntimeTree into generated Python functions.
+#
+# A node takes part when getRuntimeExpression() returns a template such as
+# "{0} + {1}". Connected pure nodes are grouped, and every group is compiled
+# into a single function that is called once per substep instead of
+# dispatching refresh/execute for each node. Unlinked inputs and outputs of
+# nodes with constant outputs are folded into literals.
+
+# sockets that carry datablock references instead of scalar values
+recordDataTypes = {"Object", "Texture2", "VertexGroup"}
+
+
+def isPureScalarNode(runtimeNode):
+    node = runtimeNode.node
+    return (len(runtimeNode.outputs) == 1 and
+            node.getRuntimeExpression() is not None)
+
+
+def fuseScalarSubgraphs(runtime):
+    '''Returns the execution schedule of the runtime with fused groups'''
+    nodes = runtime.nodes
+    ownerOf = {}
+    for runtimeNode in nodes:
+        for socket in runtimeNode.outputs:
+            ownerOf[id(socket)] = runtimeNode
+
+    pure = {id(runtimeNode): isPureScalarNode(runtimeNode) for runtimeNode in nodes}
+    if not any(pure.values()):
+        return list(nodes)
+
+    predecessors = defaultdict(list)
+    successors = defaultdict(list)
+    for runtimeNode in nodes:
+        for target, source in runtimeNode.links:
+            predecessors[id(runtimeNode)].append(ownerOf[id(source)])
+            successors[id(ownerOf[id(source)])].append(runtimeNode)
+
+    groupOf = findConvexGroups(nodes, pure, predecessors, successors)
+
+    steps = []
+    stepOf = {}
+    for runtimeNode in nodes:
+        key = id(runtimeNode)
+        if key in groupOf:
+            group = groupOf[key]
+            if id(group) not in stepOf:
+                stepOf[id(group)] = len(steps)
+                steps.append(group)
+            stepOf[key] = stepOf[id(group)]
+        else:
+            stepOf[key] = len(steps)
+            steps.append(runtimeNode)
+
+    schedule = scheduleSteps(steps, nodes, stepOf, predecessors)
+
+    return [FusedScalarGroup(step, ownerOf) if isinstance(step, list) else step
+            for step in schedule]
+
+
+def findConvexGroups(nodes, pure, predecessors, successors):
+    '''
+    Groups pure nodes connected through pure links. Nodes are only grouped
+    when the same number of impure nodes lies upstream of them, so no path can
+    leave a group and come back into it through an impure node.
+    Impure nodes without inputs can't be on such a path and are not counted.
+    '''
+    def isBarrier(runtimeNode):
+        return not pure[id(runtimeNode)] and len(predecessors[id(runtimeNode)]) > 0
+
+    depth = {}
+    for runtimeNode in nodes:
+        depth[id(runtimeNode)] = max(
+            (depth[id(p)] + isBarrier(p) for p in predecessors[id(runtimeNode)]),
+            default = 0)
+
+    groupOf = {}
+    for runtimeNode in nodes:
+        key = id(runtimeNode)
+        if not pure[key] or key in groupOf:
+            continue
+        group = [runtimeNode]
+        groupOf[key] = group
+        stack = [runtimeNode]
+        while stack:
+            current = stack.pop()
+            for other in predecessors[id(current)] + successors[id(current)]:
+                otherKey = id(other)
+                if not pure[otherKey] or otherKey in groupOf or depth[otherKey] != depth[key]:
+                    continue
+                groupOf[otherKey] = group
+                group.append(other)
+                stack.append(other)
+
+    # keep the members of every group in execution order
+    order = {id(runtimeNode): index for index, runtimeNode in enumerate(nodes)}
+    for group in {id(group): group for group in groupOf.values()}.values():
+        group.sort(key = lambda runtimeNode: order[id(runtimeNode)])
+
+    return groupOf
+
+
+def scheduleSteps(steps, nodes, stepOf, predecessors):
+    # Kahn's algorithm on the condensed graph, preferring the original order
+    dependencies = defaultdict(set)
+    for runtimeNode in nodes:
+        step = stepOf[id(runtimeNode)]
+        for predecessor in predecessors[id(runtimeNode)]:
+            predecessorStep = stepOf[id(predecessor)]
+            if predecessorStep != step:
+                dependencies[step].add(predecessorStep)
+
+    dependents = defaultdict(list)
+    inDegree = [0] * len(steps)
+    for step, required in dependencies.items():
+        inDegree[step] = len(required)
+        for predecessorStep in required:
+            dependents[predecessorStep].append(step)
+
+    queue = [step for step in range(len(steps)) if inDegree[step] == 0]
+    heapq.heapify(queue)
+    schedule = []
+    while queue:
+        step = heapq.heappop(queue)
+        schedule.append(steps[step])
+        for dependent in dependents[step]:
+            inDegree[dependent] -= 1
+            if inDegree[dependent] == 0:
+                heapq.heappush(queue, dependent)
+
+    return schedule
+
+
+class FusedScalarGroup:
+    def __init__(self, runtimeNodes, ownerOf):
+        self.runtimeNodes = runtimeNodes
+        self.source = ""
+        self.function = self.compile(ownerOf)
+
+    def run(self, runtime):
+        self.function(runtime)
+
+    def finish(self):
+        # the generated code reads linked values directly, so the input
+        # records are only synced once for the write back
+        for runtimeNode in self.runtimeNodes:
+            runtimeNode.pullInputs()
+
+    def compile(self, ownerOf):
+        compiler = GroupCompiler(self.runtimeNodes, ownerOf)
+        self.source = compiler.generate()
+        namespace = {}
+        exec(compile(self.source, "<umog fused scalar group>", "exec"),
+             {"S": compiler.sockets, "K": compiler.constants, "N": compiler.nodes},
+             namespace)
+        return namespace["fusedScalarGroup"]
+
+
+class GroupCompiler:
+    def __init__(self, runtimeNodes, ownerOf):
+        self.runtimeNodes = runtimeNodes
+        self.ownerOf = ownerOf
+
+        # tables referenced by the generated code
+        self.sockets = []
+        self.constants = []
+        self.nodes = []
+        self.socketIndex = {}
+        self.constantIndex = {}
+
+        # output socket id -> (code, is literal, folded value)
+        self.expressions = {}
+        self.lines = []
+
+    def generate(self):
+        for runtimeNode in self.runtimeNodes:
+            self.compileNode(runtimeNode)
+
+        body = self.lines or ["pass"]
+        return "def fusedScalarGroup(runtime):\n" + "".join("    " + line + "\n" for line in body)
+
+    def compileNode(self, runtimeNode):
+        node = runtimeNode.node
+        arguments = [self.compileInput(runtimeNode, socket) for socket in runtimeNode.inputs]
+        expression = node.getRuntimeExpression().format(*(code for code, _ in arguments))
+        output = runtimeNode.outputs[0]
+        # nodes without inputs (e.g. the frame) depend on the runtime state
+        isConstant = len(arguments) > 0 and all(literal for _, literal in arguments)
+
+        if output.dataType in recordDataTypes:
+            self.lines.append("{}.assign({})".format(self.socket(output), expression))
+            self.expressions[id(output)] = (self.socket(output), False, None)
+            return
+
+        if isConstant:
+            try:
+                value = output.convert(eval(expression, {"K": self.constants}))
+            except Exception:
+                # keep the runtime behaviour (e.g. printing division by zero)
+                pass
+            else:
+                # folded once; the record keeps the value for other readers
+                output.value = value
+                self.expressions[id(output)] = (self.literal(value), True, value)
+                return
+
+        variable = "v{}".format(len(self.expressions))
+        converted = "{}({})".format(self.constant(output.convert), expression)
+
+        if hasattr(node, "printZeroDivision"):
+            self.lines.extend([
+                "try:",
+                "    {} = {}".format(variable, converted),
+                "except ZeroDivisionError:",
+                "    {}.printZeroDivision()".format(self.node(node)),
+                "    {} = {}.value".format(variable, self.socket(output))])
+        else:
+            self.lines.append("{} = {}".format(variable, converted))
+
+        self.lines.append("{}.value = {}".format(self.socket(output), variable))
+        self.expressions[id(output)] = (variable, False, None)
+
+    def compileInput(self, runtimeNode, socket):
+        '''Returns (code, is literal) for the value an input has in this substep'''
+        source = None
+        for target, linkedSocket in runtimeNode.links:
+            if target is socket:
+                source = linkedSocket
+
+        isRecord = socket.dataType in recordDataTypes
+
+        if source is None:
+            # unlinked or packed: constant for the whole bake
+            if isRecord:
+                return self.socket(socket), False
+            return self.literal(socket.value), True
+
+        if id(source) in self.expressions:
+            code, literal, value = self.expressions[id(source)]
+            if literal:
+                return self.literal(socket.convert(value)), True
+            if isRecord:
+                return code, False
+            return "{}({})".format(self.constant(socket.convert), code), False
+
+        sourceNode = self.ownerOf[id(source)].node
+        if isRecord:
+            return self.socket(source), False
+        if sourceNode.hasConstantOutputs:
+            return self.literal(socket.convert(source.value)), True
+        return "{}({}.value)".format(self.constant(socket.convert), self.socket(source)), False
+
+    def literal(self, value):
+        if type(value) in (bool, int) or (type(value) is float and math.isfinite(value)):
+            return repr(value)
+        return self.constant(value)
+
+    def socket(self, socket):
+        key = id(socket)
+        if key not in self.socketIndex:
+            self.socketIndex[key] = len(self.sockets)
+            self.sockets.append(socket)
+        return "S[{}]".format(self.socketIndex[key])
+
+    def constant(self, value):
+        key = id(value)
+        if key not in self.constantIndex:
+            self.constantIndex[key] = len(self.constants)
+            self.constants.append(value)
+        return "K[{}]".format(self.constantIndex[key])
+
+    def node(self, node):
+        self.nodes.append(node)
+        return "N[{}]".format(len(self.nodes) - 1)
@@ -8,6 +8,9 @@ class BooleanNode(bpy.types.Node, UMOGNode):
     bl_label = "Boolean"
     assignedType = "Boolean"
 
+    hasRuntimeRefresh = True
+    hasConstantOutputs = True
+
     input_value : bpy.props.IntProperty(update=propUpdate)
 
     def create(self):
@@ -8,6 +8,9 @@ class BooleanMathNode(bpy.types.Node, UMOGNode):
 
     assignedType = "Boolean"
 
+    hasRuntimeRefresh = True
+    executeReadsSockets = False
+
     fixed_items : bpy.props.EnumProperty(items=(('0', 'and', 'and'),
                                                 ('1', 'or', 'or'),
                                                 ('2', '==', 'equals')),
@@ -24,20 +27,32 @@ class BooleanMathNode(bpy.types.Node, UMOGNode):
 
     def execute(self, refholder):
         self.applyOperation()
-    
+
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        outputs[0].value = outputs[0].convert(self.calculate(inputs[0].value, inputs[1].value))
+
+    def runtimeExecute(self, inputs, outputs, runtime):
+        # the result was already computed by runtimeRefresh in this substep
+        pass
+
+    def getRuntimeExpression(self):
+        return {'0': "({0} and {1})",
+                '1': "({0} or {1})",
+                '2': "({0} == {1})"}[self.fixed_items]
+
     def applyOperation(self):
+        self.outputs[0].value = self.calculate(self.inputs[0].value, self.inputs[1].value)
+        self.outputs[0].name = str(self.outputs[0].value)
+
+    def calculate(self, a, b):
         if self.fixed_items == '0':
-            self.outputs[0].value = (self.inputs[0].value and self.inputs[1].value)
+            return (a and b)
 
         elif self.fixed_items == '1':
-            # Subtraction
-            self.outputs[0].value = (self.inputs[0].value or self.inputs[1].value)
+            return (a or b)
 
         elif self.fixed_items == '2':
-            # Mult
-            self.outputs[0].value = (self.inputs[0].value == self.inputs[1].value)
-
-        self.outputs[0].name = str(self.outputs[0].value)
+            return (a == b)
 
     def draw_buttons(self, context, layout):
         layout.prop(self, "fixed_items", text='Operation')
@@ -8,6 +8,9 @@ class FloatNode(bpy.types.Node, UMOGNode):
     bl_label = "Float"
     assignedType = "Float"
 
+    hasRuntimeRefresh = True
+    hasConstantOutputs = True
+
     input_value : bpy.props.IntProperty(update=propUpdate)
 
     def create(self):
@@ -8,6 +8,9 @@ class FloatMathNode(bpy.types.Node, UMOGNode):
 
     assignedType = "Float"
 
+    hasRuntimeRefresh = True
+    executeReadsSockets = False
+
     fixed_items : bpy.props.EnumProperty(items=(('0', '+', 'addition'),
                                                 ('1', '-', 'subtraction'),
                                                 ('2', '*', 'multiplication'),
@@ -28,39 +31,64 @@ class FloatMathNode(bpy.types.Node, UMOGNode):
 
     def execute(self, refholder):
         self.applyOperation()
-    
+
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        try:
+            outputs[0].value = outputs[0].convert(
+                self.calculate(inputs[0].value, inputs[1].value))
+        except ZeroDivisionError:
+            self.printZeroDivision()
+
+    def runtimeExecute(self, inputs, outputs, runtime):
+        # the result was already computed by runtimeRefresh in this substep
+        pass
+
+    def getRuntimeExpression(self):
+        return {'0': "({0} + {1})",
+                '1': "({0} - {1})",
+                '2': "({0} * {1})",
+                '3': "({0} / {1})",
+                '4': "({0} ^ {1})",
+                '5': "({0} % {1})"}[self.fixed_items]
+
     def applyOperation(self):
+        try:
+            self.outputs[0].value = self.calculate(self.inputs[0].value, self.inputs[1].value)
+        except ZeroDivisionError:
+            self.printZeroDivision()
+
+        self.outputs[0].name = "{:.5f}".format(self.outputs[0].value)
+
+    def calculate(self, a, b):
         if self.fixed_items == '0':
             # Addition
-            self.outputs[0].value = self.inputs[0].value + self.inputs[1].value
+            return a + b
 
         elif self.fixed_items == '1':
             # Subtraction
-            self.outputs[0].value = self.inputs[0].value - self.inputs[1].value
+            return a - b
 
         elif self.fixed_items == '2':
             # Mult
-            self.outputs[0].value = self.inputs[0].value * self.inputs[1].value
+            return a * b
 
         elif self.fixed_items == '3':
             # Div
-            try:
-                self.outputs[0].value = self.inputs[0].value / self.inputs[1].value
-            except:
-                print("div by zero")
+            return a / b
 
         elif self.fixed_items == '4':
             # Expo
-            self.outputs[0].value = self.inputs[0].value ^ self.inputs[1].value
+            return a ^ b
 
         elif self.fixed_items == '5':
             # Mod
-            try:
-                self.outputs[0].value = self.inputs[0].value % self.inputs[1].value
-            except:
-                print("mod by zero")
+            return a % b
 
-        self.outputs[0].name = "{:.5f}".format(self.outputs[0].value)
+    def printZeroDivision(self):
+        if self.fixed_items == '5':
+            print("mod by zero")
+        else:
+            print("div by zero")
 
     def draw(self, layout):
         layout.prop(self, "fixed_items", text='Operation')
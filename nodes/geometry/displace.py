@@ -1,4 +1,9 @@
 from ...base_types import UMOGOutputNode
+from ...mesh.arrays import (readShapeCoordinates, writeShapeKeyCoordinates, readPolygonLoops,
+                            calculateVertexNormals, readVertexUVs)
+from ...mesh.displacement import textureCoordinates, sampleHeights, displace
+from ...mesh.shape_keys import applyShapeKeyMix, archiveShapeKeys
+from ...mesh.backend import evaluateModifier
 import bpy
 import numpy as np
 from mathutils import Vector
@@ -10,6 +15,8 @@ class DisplaceNode(bpy.types.Node, UMOGOutputNode):
 
     assignedType = "Object"
 
+    hasRuntimeRefresh = True
+
     mesh_name : bpy.props.StringProperty()
     mesh_dupl_name : bpy.props.StringProperty()
 
@@ -21,7 +28,33 @@ class DisplaceNode(bpy.types.Node, UMOGOutputNode):
     mod_midlevel : bpy.props.FloatProperty(min = 0.0, max = 1.0, default = 0.5)
     mod_strength : bpy.props.FloatProperty(default = 1.0)
 
+    # Nodes of older files keep the modifier, which evaluates the texture in
+    # 3D; new nodes use the native engine, see create
+    displaceEngine : bpy.props.EnumProperty(items=
+        (('NATIVE', 'Native', 'Displace the vertex arrays directly, sampling the packed 2D texture at x and y (repeats outside -1..1)'),
+         ('MODIFIER', 'Modifier', 'Apply a displace modifier as shape key every frame, evaluating the texture in 3D')
+        ),
+        name="Engine",
+        default = 'MODIFIER')
+
+    textureSpace : bpy.props.EnumProperty(items=
+        (('OBJECT', 'Object', 'Sample the texture at the local object coordinates'),
+         ('UV', 'UV', 'Sample the texture at the active UV coordinates')
+        ),
+        name="Texture Space",
+        default = 'OBJECT')
+
+    keepPreviousBakes : bpy.props.BoolProperty(name = "Keep Previous Bakes", default = False,
+        description = "Archive the shape keys of the previous bake in a copy of the mesh instead of discarding them")
+
+    def draw(self, layout):
+        layout.prop(self, "displaceEngine", text="")
+        if self.displaceEngine == 'NATIVE':
+            layout.prop(self, "textureSpace", text="")
+        layout.prop(self, "keepPreviousBakes")
+
     def create(self):
+        self.displaceEngine = 'NATIVE'
         self.newInput(self.assignedType, "Object")
         self.newInput("VertexGroup", "Vertex Group")
         socket = self.newInput("Texture2", "Texture")
@@ -49,79 +82,106 @@ class DisplaceNode(bpy.types.Node, UMOGOutputNode):
         self.outputs[1].value = self.inputs[1].value
         self.outputs[1].refresh()
 
-    def execute(self, refholder):
-        self.inputs[0].setViewObjectMode()
-        self.inputs[0].setSelected()
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        if inputs[0].value == '':
+            inputs[1].value = ''
+            inputs[1].object = ''
+        else:
+            inputs[1].object = inputs[0].value
+        runtime.resolve(inputs[1])
 
-        obj = self.inputs[0].getObject()
-        vertexGroup = self.inputs[1].value
-        texture = self.inputs[2].getTexture()
-        midLevel = self.inputs[3].value
-        strength = self.inputs[4].value
-        # isAdditive = self.inputs[5].value
+        outputs[0].assign(inputs[0])
+        outputs[1].assign(inputs[1])
+
+    def execute(self, refholder):
+        if self.displaceEngine == 'NATIVE':
+            self.executeNative(refholder)
+        else:
+            self.executeModifier(refholder)
 
+    def executeNative(self, refholder):
         # Is Object and Texture are Linked
         inputIsCorrect = self.inputs[0].is_linked and self.inputs[2].value != ''
 
         if inputIsCorrect == False:
             print("no texture specified")
-            return 
-        
-        objData = obj.data
-        # objData.calc_normals_split()
-        shapeKeys = None
-        hasShapes = objData.shape_keys is not None
-
-        if hasShapes:
-            shapeKeys = objData.shape_keys.key_blocks
-            keyNorms = shapeKeys[-1].normals_vertex_get()
-            print(shapeKeys[-1].name)
-            npNorms = np.asarray(keyNorms, dtype="float")
-            npNorms = npNorms.reshape((len(objData.vertices), 3))
-
-            objData.normals_split_custom_set_from_vertices(npNorms)
-            objData.use_auto_smooth = True
+            return
 
-            shapeKeys[-1].value = 0
-        else:
-            self.resetNormals(objData)
-
-        oname = "DISPLACE"
-        mod = obj.modifiers.new(name = oname, type = 'DISPLACE')
-        mod.texture = texture
-        mod.mid_level = midLevel
-        mod.strength = strength
-        if hasShapes:
-            mod.direction = 'CUSTOM_NORMAL'
-        else:
-            mod.direction = 'NORMAL'
+        obj = self.inputs[0].getObject()
+        refholder.meshSession.release(obj)
+        objData = obj.data
+        vertexGroup = self.inputs[1].value
+        midLevel = self.inputs[3].value
+        strength = self.inputs[4].value
 
-        if vertexGroup != '':
-            mod.vertex_group = vertexGroup
+        state = refholder.execution_scratch.setdefault(self.name, {})
 
-        bpy.ops.object.modifier_apply_as_shapekey(modifier = oname)
+        # the last shape key holds the result so far, including the changes
+        # of geometry nodes that ran before
+        coords = readShapeCoordinates(obj)
 
-        if shapeKeys is None:
-            shapeKeys = objData.shape_keys.key_blocks
+        loopVertices, loopStarts, loopTotals = readPolygonLoops(objData)
+        normals = calculateVertexNormals(coords, loopVertices, loopStarts, loopTotals)
 
-        soFarShape = shapeKeys[-2]
-        soFarShape.value = 1
+        uvs = None
+        if self.textureSpace == 'UV':
+            uvs = readVertexUVs(objData, loopVertices)
+        u, v = textureCoordinates(coords, uvs)
+        heights = sampleHeights(self.getTexturePixels(state), u, v)
 
-        dispShape = shapeKeys[-1]
-        dispShape.value = 1
+        weights = None
+        if vertexGroup != '':
+            weights = self.inputs[1].getWeights()
 
-        bpy.ops.object.shape_key_add(from_mix = True)
-        obj.shape_key_remove(dispShape)
-        soFarShape.value = 0
-        accumShape = shapeKeys[-1]
+        coords = displace(coords, normals, heights, midLevel, strength, weights)
+        self.writeCoordinates(obj, state, coords)
 
-        accumShape.value = 1
+    def writeCoordinates(self, obj, state, coords):
+        if self.nodeTree.properties.BakeTarget == 'CACHE':
+            # the tree records the mesh into the frame cache after every frame
+            obj.data.vertices.foreach_set("co", coords.ravel())
+        else:
+            writeShapeKeyCoordinates(self.getFrameShape(obj, state), coords)
+        obj.data.update()
+
+    def getTexturePixels(self, state):
+        socket = self.inputs[2]
+        if socket.isPacked:
+            return socket.getPixels()
+
+        # Evaluated once per frame, substeps reuse the pixels
+        key = (socket.value, bpy.context.scene.frame_current)
+        if state.get("pixelsKey") != key:
+            resolution = self.nodeTree.properties.TextureResolution
+            state["pixels"] = socket.evaluatePixels(resolution)
+            state["pixelsKey"] = key
+        return state["pixels"]
+
+    def getFrameShape(self, obj, state):
+        '''
+        Returns the shape key of the current frame. Every frame gets one key
+        copied from the basis, only the previous frame key is switched off so
+        the cost doesn't grow with the number of baked frames.
+        '''
+        frame = bpy.context.scene.frame_current
+        if state.get("frame") == frame:
+            return obj.data.shape_keys.key_blocks[state["shapeKey"]]
+
+        if obj.data.shape_keys is None:
+            obj.shape_key_add(name = "Basis", from_mix = False)
+
+        shapeKeys = obj.data.shape_keys.key_blocks
+        previousShape = shapeKeys.get(state.get("shapeKey", ""))
+        if previousShape is not None:
+            previousShape.value = 0
 
         bakeCount = self.nodeTree.properties.bakeCount
-        accumShape.name = "baked_umog_" + str(bakeCount) + "_displace_" + str(
-            bpy.context.scene.frame_current)
+        frameShape = obj.shape_key_add(name = "baked_umog_" + str(bakeCount) + "_displace_" + str(
+            frame), from_mix = False)
+        frameShape.value = 1
 
-        obj.update_from_editmode()
+        state["frame"] = frame
+        state["shapeKey"] = frameShape.name
 
         obj.hasUMOGBaked = True
         obj.bakeCount = bakeCount
@@ -129,8 +189,42 @@ class DisplaceNode(bpy.types.Node, UMOGOutputNode):
         if bakeCount not in obj.data.bakedKeys:
             obj.data.bakedKeys[bakeCount] = []
 
-        obj.data.bakedKeys[bakeCount].append(accumShape)
-            
+        obj.data.bakedKeys[bakeCount].append(frameShape)
+
+        return frameShape
+
+    def executeModifier(self, refholder):
+        # Is Object and Texture are Linked
+        inputIsCorrect = self.inputs[0].is_linked and self.inputs[2].value != ''
+
+        if inputIsCorrect == False:
+            print("no texture specified")
+            return
+
+        obj = self.inputs[0].getObject()
+        refholder.meshSession.release(obj)
+        vertexGroup = self.inputs[1].value
+
+        state = refholder.execution_scratch.setdefault(self.name, {})
+
+        modifier = obj.modifiers.new(name = "DISPLACE", type = 'DISPLACE')
+        modifier.texture = self.inputs[2].getTexture()
+        modifier.mid_level = self.inputs[3].value
+        modifier.strength = self.inputs[4].value
+        # the normals of the evaluated mesh follow the baked shape
+        modifier.direction = 'NORMAL'
+
+        if vertexGroup != '':
+            # the modifier reads the weights from the vertex group
+            self.inputs[1].materialize()
+            modifier.vertex_group = vertexGroup
+
+        try:
+            coords = evaluateModifier(obj, modifier)
+        finally:
+            obj.modifiers.remove(modifier)
+
+        self.writeCoordinates(obj, state, coords)
 
     def write_keyframe(self, refholder, frame):
         pass
@@ -139,25 +233,12 @@ class DisplaceNode(bpy.types.Node, UMOGOutputNode):
         #     vertex.keyframe_insert(data_path='co', frame=frame)
 
     def preExecute(self, refholder):
-        self.inputs[0].setSelected()
+        refholder.execution_scratch[self.name] = {}
         obj = self.inputs[0].getObject()
-        objData = obj.data
-        hasShapes = objData.shape_keys is not None
-        
-        if hasShapes:
-            shapeKeys = objData.shape_keys.key_blocks
-            bpy.ops.object.shape_key_add(from_mix = True)
-
-            # bpy.context.area.type = "VIEW_3D"
-            while len(shapeKeys) > 0:
-                currShape = shapeKeys[0]
-                obj.shape_key_remove(currShape)
-            # bpy.context.area.type = "NODE_EDITOR"
-
-    def postBake(self, refholder):
-         obj = self.inputs[0].getObject()
-         self.resetNormals(obj.data)
-
-    def resetNormals(self, objData):
-        objData.use_auto_smooth = False
-        bpy.ops.mesh.customdata_custom_splitnormals_clear()
+
+        if obj.data.shape_keys is not None:
+            if self.keepPreviousBakes:
+                archiveName = obj.data.name + "_baked_umog_" + str(obj.bakeCount)
+                archiveShapeKeys(obj, archiveName)
+            applyShapeKeyMix(obj)
+
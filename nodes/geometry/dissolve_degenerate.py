@@ -1,5 +1,7 @@
 from ...base_types import UMOGOutputNode
+from ...mesh.session import selectVertexGroup
 import bpy
+import bmesh
 import numpy as np
 from mathutils import Vector
 
@@ -10,6 +12,8 @@ class DissolveDegenerateNode(bpy.types.Node, UMOGOutputNode):
 
     assignedType = "Object"
 
+    hasRuntimeRefresh = True
+
     def create(self):
         self.newInput(self.assignedType, "Object")
         self.newInput("VertexGroup", "Vertex Group")
@@ -35,16 +39,23 @@ class DissolveDegenerateNode(bpy.types.Node, UMOGOutputNode):
         self.outputs[1].value = self.inputs[1].value
         self.outputs[1].refresh()
 
-    def execute(self, refholder):
-        if self.inputs[1].value == '':
-            self.inputs[0].setSelected()
-            overrideContext = self.inputs[0].setViewEditMode(selectAll = 'SELECT')
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        if inputs[0].value == '':
+            inputs[1].value = ''
+            inputs[1].object = ''
         else:
-            self.inputs[1].setSelected()
-            overrideContext = self.inputs[1].select()
+            inputs[1].object = inputs[0].value
+        runtime.resolve(inputs[1])
+
+        outputs[0].assign(inputs[0])
+        outputs[1].assign(inputs[1])
+
+    def execute(self, refholder):
+        obj = self.inputs[0].getObject()
+        bm = refholder.meshSession.acquire(obj)
 
-        bpy.ops.mesh.dissolve_degenerate(overrideContext, threshold=self.inputs[2].value)
-        self.inputs[0].setViewObjectMode()
+        verts, edges, faces = selectVertexGroup(bm, obj, self.inputs[1].value)
+        bmesh.ops.dissolve_degenerate(bm, dist = self.inputs[2].value, edges = edges)
 
     def write_keyframe(self, refholder, frame):
         pass
@@ -1,5 +1,7 @@
 from ...base_types import UMOGOutputNode
+from ...mesh.session import selectVertexGroup
 import bpy
+import bmesh
 import numpy as np
 import math
 from mathutils import Vector
@@ -11,6 +13,8 @@ class DissolveLimitedNode(bpy.types.Node, UMOGOutputNode):
 
     assignedType = "Object"
 
+    hasRuntimeRefresh = True
+
     delimitOptions : bpy.props.EnumProperty(items=
         (('NORMAL', 'Normal', 'Delimit by face directions.'),
          ('MATERIAL ', 'Material', 'Delimit by face material.'),
@@ -53,19 +57,28 @@ class DissolveLimitedNode(bpy.types.Node, UMOGOutputNode):
         self.outputs[1].value = self.inputs[1].value
         self.outputs[1].refresh()
 
-    def execute(self, refholder):
-        if self.inputs[1].value == '':
-            self.inputs[0].setSelected()
-            overrideContext = self.inputs[0].setViewEditMode(selectAll = 'SELECT')
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        if inputs[0].value == '':
+            inputs[1].value = ''
+            inputs[1].object = ''
         else:
-            self.inputs[1].setSelected()
-            overrideContext = self.inputs[1].select()
-        
+            inputs[1].object = inputs[0].value
+        runtime.resolve(inputs[1])
+
+        outputs[0].assign(inputs[0])
+        outputs[1].assign(inputs[1])
+
+    def execute(self, refholder):
+        obj = self.inputs[0].getObject()
+        bm = refholder.meshSession.acquire(obj)
+
+        verts, edges, faces = selectVertexGroup(bm, obj, self.inputs[1].value)
         angleLimit = math.radians(self.inputs[2].value)
         boundries = self.inputs[3].value
+        delimit = {option.strip() for option in self.delimitOptions}
 
-        bpy.ops.mesh.dissolve_limited(angle_limit=angleLimit, use_dissolve_boundaries=boundries, delimit=self.delimitOptions)
-        self.inputs[0].setViewObjectMode()
+        bmesh.ops.dissolve_limited(bm, angle_limit = angleLimit, use_dissolve_boundaries = boundries,
+                                   verts = verts, edges = edges, delimit = delimit)
 
     def write_keyframe(self, refholder, frame):
         pass
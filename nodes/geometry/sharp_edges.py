@@ -1,9 +1,9 @@
 from ...base_types import UMOGOutputNode
+from ...mesh.arrays import (readPolygonLoops, readShapePolygonNormals, readLoopEdges,
+                            findManifoldEdgeFaces, calculateDihedralAngles)
 import bpy
 import numpy as np
 import math
-from mathutils import Vector
-import bmesh
 
 class SharpEdgesNode(bpy.types.Node, UMOGOutputNode):
     bl_idname = "umog_SharpEdgesNode"
@@ -11,6 +11,14 @@ class SharpEdgesNode(bpy.types.Node, UMOGOutputNode):
 
     assignedType = "Object"
 
+    hasRuntimeRefresh = True
+
+    writeEachFrame : bpy.props.BoolProperty(name = "Write Vertex Group", default = False,
+        description = "Write the vertex group every frame instead of keeping the weights in memory until the bake ends")
+
+    def draw(self, layout):
+        layout.prop(self, "writeEachFrame")
+
     def create(self):
         self.newInput(self.assignedType, "Object")
         self.newInput("Float", "Sharpness", value = 20, minValue = 0.0, maxValue= 180)
@@ -40,39 +48,47 @@ class SharpEdgesNode(bpy.types.Node, UMOGOutputNode):
             self.outputs[1].object = self.inputs[0].value
             self.outputs[1].refresh()
 
-    def execute(self, refholder):
-        self.selectVertexGroup()
-        self.inputs[0].setSelected()
-        overrideContext = self.inputs[0].setViewEditMode(selectAll = 'DESELECT')
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        outputs[0].assign(inputs[0])
 
-        angleLimit = math.radians(self.inputs[1].value)
-        bpy.ops.mesh.edges_select_sharp(sharpness=angleLimit)
+        if inputs[0].value == '':
+            outputs[1].value = ''
+            outputs[1].object = ''
+        else:
+            outputs[1].value = self.name
+            outputs[1].object = inputs[0].value
+        runtime.resolve(outputs[1])
 
+    def execute(self, refholder):
         obj = self.inputs[0].getObject()
+        refholder.meshSession.release(obj)
         objData = obj.data
-        
-        obj.update_from_editmode()
 
-        bm = bmesh.from_edit_mesh(obj.data)
-        bm.edges.ensure_lookup_table()
-        selected = [e for e in bm.edges if e.select]
+        sharpness = math.radians(self.inputs[1].value)
+        weight = self.inputs[2].value
+        inverse = self.inputs[3].value
+
+        loopVertices, loopStarts, loopTotals = readPolygonLoops(objData)
+        normals = readShapePolygonNormals(obj, loopVertices, loopStarts, loopTotals)
 
-        for e in selected:
-           faces = e.link_faces
-           for f in faces:
-               f.select = True
+        edges, firstFaces, secondFaces = findManifoldEdgeFaces(
+            readLoopEdges(objData), loopTotals, len(objData.edges))
+        sharpEdges = calculateDihedralAngles(normals, firstFaces, secondFaces) > sharpness
 
-        if self.inputs[3].value == True:
-            bpy.ops.mesh.select_all(action='INVERT')
+        # the faces linked to a sharp edge are selected
+        faceWeights = np.zeros(len(loopTotals), dtype = np.float32)
+        faceWeights[firstFaces[sharpEdges]] = 1
+        faceWeights[secondFaces[sharpEdges]] = 1
 
-        bmesh.update_edit_mesh(obj.data)
-        # bm.free()
-        obj.update_from_editmode()
+        vertexWeights = np.zeros(len(objData.vertices), dtype = np.float32)
+        np.maximum.at(vertexWeights, loopVertices, np.repeat(faceWeights, loopTotals))
 
-        bpy.context.scene.tool_settings.vertex_group_weight = self.inputs[2].value
-        bpy.ops.object.vertex_group_assign()
+        if inverse:
+            vertexWeights = 1 - vertexWeights
 
-        self.inputs[0].setViewObjectMode()
+        self.outputs[1].setWeights(vertexWeights * np.float32(weight))
+        if self.writeEachFrame:
+            self.outputs[1].materialize()
 
     def write_keyframe(self, refholder, frame):
         pass
@@ -81,28 +97,14 @@ class SharpEdgesNode(bpy.types.Node, UMOGOutputNode):
         self.setupVertexGroupOutput()
 
     def postBake(self, refholder):
-        pass
+        self.outputs[1].materialize()
 
     def setupVertexGroupOutput(self):
         name = self.name
         obj = self.inputs[0].getObject()
 
         if name not in obj.vertex_groups:
-            bpy.ops.object.vertex_group_add()
-            obj.vertex_groups.active.name = name
+            obj.vertex_groups.new(name = name)
 
         self.outputs[1].value = name
         self.outputs[1].object = self.inputs[0].value
-
-    def selectVertexGroup(self):
-        name = self.name
-        obj = self.inputs[0].getObject()
-
-        if name in obj.vertex_groups:
-            obj.vertex_groups.active_index = obj.vertex_groups[name].index
-            self.inputs[0].setSelected()
-            overrideContext = self.inputs[0].setViewEditMode(selectAll = 'SELECT')
-            bpy.ops.object.vertex_group_remove_from()
-            self.inputs[0].setViewObjectMode()
-
-
@@ -1,9 +1,8 @@
 from ...base_types import UMOGOutputNode
+from ...mesh.arrays import (readPolygonLoops, readShapePolygonNormals,
+                            polygonMaskToVertexMask)
 import bpy
 import numpy as np
-import math
-from mathutils import Vector
-import bmesh
 
 class SharpFacesNode(bpy.types.Node, UMOGOutputNode):
     bl_idname = "umog_SharpFacesNode"
@@ -11,6 +10,14 @@ class SharpFacesNode(bpy.types.Node, UMOGOutputNode):
 
     assignedType = "Object"
 
+    hasRuntimeRefresh = True
+
+    writeEachFrame : bpy.props.BoolProperty(name = "Write Vertex Group", default = False,
+        description = "Write the vertex group every frame instead of keeping the weights in memory until the bake ends")
+
+    def draw(self, layout):
+        layout.prop(self, "writeEachFrame")
+
     def create(self):
         self.newInput(self.assignedType, "Object")
         self.newInput("Float", "Angle", value = 20, minValue = 0.0, maxValue= 180)
@@ -41,60 +48,59 @@ class SharpFacesNode(bpy.types.Node, UMOGOutputNode):
             self.outputs[1].object = self.inputs[0].value
             self.outputs[1].refresh()
 
-    def execute(self, refholder):
-        self.selectVertexGroup()
-        self.inputs[0].setSelected()
-        overrideContext = self.inputs[0].setViewEditMode(selectAll = 'DESELECT')
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        outputs[0].assign(inputs[0])
 
-        angleLimit = math.radians(self.inputs[1].value)
-        # bpy.ops.mesh.edges_select_sharp(sharpness=angleLimit)
+        if inputs[0].value == '':
+            outputs[1].value = ''
+            outputs[1].object = ''
+        else:
+            outputs[1].value = self.name
+            outputs[1].object = inputs[0].value
+        runtime.resolve(outputs[1])
 
+    def execute(self, refholder):
         obj = self.inputs[0].getObject()
+        refholder.meshSession.release(obj)
         objData = obj.data
-        
-        obj.update_from_editmode()
-
-        bm = bmesh.from_edit_mesh(obj.data)
-        bm.faces.ensure_lookup_table()
-
-        for f in bm.faces:
-            try:
-                f.select = False
-                loc, rot, scale = obj.matrix_world.decompose()
-                zangle = Vector((0,0,1)).angle(rot @ f.normal)
-                
-                top = self.inputs[3].value
-                bottom = self.inputs[4].value
-                angle = self.inputs[1].value
-                
-                zangle = math.degrees(zangle)   
-                posDir = zangle <= angle
-                negDir = zangle >= 180 - angle
-                
-                if top and not bottom:
-                    if posDir:
-                        f.select = True
-                elif bottom and not top:
-                    if negDir:
-                        f.select = True
-                elif top and bottom:
-                    if posDir or negDir:
-                        f.select = True
-            except Exception as e:
-                pass
-
-        bmesh.update_edit_mesh(obj.data)
-        bm.free()
-
-        if self.inputs[2].value == True:
-            bpy.ops.mesh.select_all(action='INVERT')
-
-        obj.update_from_editmode()
-
-        bpy.context.scene.tool_settings.vertex_group_weight = self.inputs[5].value
-        bpy.ops.object.vertex_group_assign()
-
-        self.inputs[0].setViewObjectMode()
+
+        angle = self.inputs[1].value
+        inverse = self.inputs[2].value
+        top = self.inputs[3].value
+        bottom = self.inputs[4].value
+        weight = self.inputs[5].value
+
+        loopVertices, loopStarts, loopTotals = readPolygonLoops(objData)
+        normals = readShapePolygonNormals(obj, loopVertices, loopStarts, loopTotals)
+
+        loc, rot, scale = obj.matrix_world.decompose()
+        normals = normals @ np.array(rot.to_matrix(), dtype = np.float32).T
+
+        lengths = np.linalg.norm(normals, axis = 1)
+        hasNormal = lengths > 0
+        cosines = np.divide(normals[:, 2], lengths, out = np.zeros_like(lengths),
+                            where = hasNormal)
+        zangles = np.degrees(np.arccos(np.clip(cosines, -1, 1)))
+
+        posDir = zangles <= angle
+        negDir = zangles >= 180 - angle
+
+        selected = np.zeros(len(normals), dtype = bool)
+        if top:
+            selected |= posDir
+        if bottom:
+            selected |= negDir
+        # faces without area have no normal and are never selected
+        selected &= hasNormal
+
+        vertexMask = polygonMaskToVertexMask(selected, loopVertices, loopTotals,
+                                             len(objData.vertices))
+        if inverse:
+            vertexMask = ~vertexMask
+
+        self.outputs[1].setWeights(vertexMask * np.float32(weight))
+        if self.writeEachFrame:
+            self.outputs[1].materialize()
 
     def write_keyframe(self, refholder, frame):
         pass
@@ -103,27 +109,14 @@ class SharpFacesNode(bpy.types.Node, UMOGOutputNode):
         self.setupVertexGroupOutput()
 
     def postBake(self, refholder):
-        pass
+        self.outputs[1].materialize()
 
     def setupVertexGroupOutput(self):
         name = self.name
         obj = self.inputs[0].getObject()
 
         if name not in obj.vertex_groups:
-            bpy.ops.object.vertex_group_add()
-            obj.vertex_groups.active.name = name
+            obj.vertex_groups.new(name = name)
 
         self.outputs[1].value = name
         self.outputs[1].object = self.inputs[0].value
-
-    def selectVertexGroup(self):
-        name = self.name
-        obj = self.inputs[0].getObject()
-
-        if name in obj.vertex_groups:
-            obj.vertex_groups.active_index = obj.vertex_groups[name].index
-            self.inputs[0].setSelected()
-            overrideContext = self.inputs[0].setViewEditMode(selectAll = 'SELECT')
-            bpy.ops.object.vertex_group_remove_from()
-            self.inputs[0].setViewObjectMode()
-
@@ -1,5 +1,8 @@
 from ...base_types import UMOGOutputNode
+from ...mesh.session import selectVertexGroup
+from ...mesh.backend import clearCustomNormals
 import bpy
+import bmesh
 import numpy as np
 from mathutils import Vector
 
@@ -10,6 +13,8 @@ class SubdivideNode(bpy.types.Node, UMOGOutputNode):
 
     assignedType = "Object"
 
+    hasRuntimeRefresh = True
+
     def create(self):
         self.newInput(self.assignedType, "Object")
         self.newInput("VertexGroup", "Vertex Group")
@@ -41,36 +46,44 @@ class SubdivideNode(bpy.types.Node, UMOGOutputNode):
         self.outputs[1].value = self.inputs[1].value
         self.outputs[1].refresh()
 
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        if inputs[0].value == '':
+            inputs[1].value = ''
+            inputs[1].object = ''
+        else:
+            inputs[1].object = inputs[0].value
+        runtime.resolve(inputs[1])
+
+        outputs[0].assign(inputs[0])
+        outputs[1].assign(inputs[1])
+
     def execute(self, refholder):
         obj = self.inputs[0].getObject()
-        obj.data.update()
-        self.resetNormals(obj.data)
-        obj.data.update()
+        if obj.data.use_auto_smooth and obj.data.has_custom_normals:
+            refholder.meshSession.release(obj)
+            clearCustomNormals(obj.data)
 
-        faceCount = len(obj.data.polygons)
+        bm = refholder.meshSession.acquire(obj)
+        vertexGroup = self.inputs[1].value
+
+        faceCount = len(bm.faces)
         limitFaces = self.inputs[4].value
         faceLimit = self.inputs[5].value
 
         if limitFaces and faceCount>=faceLimit:
             return
 
-        if self.inputs[1].value == '':
-            self.inputs[0].setSelected()
-            self.inputs[0].setViewEditMode(selectAll='SELECT')
-        else:
-            self.inputs[1].setSelected()
-            self.inputs[1].setViewEditMode(selectAll='DESELECT')
-
-            bpy.ops.mesh.select_face_by_sides(number=4, type='NOTEQUAL', extend=True)
-            bpy.ops.mesh.quads_convert_to_tris(quad_method='BEAUTY', ngon_method='BEAUTY')
+        if vertexGroup != '':
+            nonQuads = [f for f in bm.faces if len(f.verts) != 4]
+            bmesh.ops.triangulate(bm, faces = nonQuads)
 
-            self.inputs[1].select()
-            bpy.ops.mesh.tris_convert_to_quads(face_threshold=3.14159, shape_threshold=3.14159)
+            verts, edges, faces = selectVertexGroup(bm, obj, vertexGroup)
+            bmesh.ops.join_triangles(bm, faces = faces, angle_face_threshold = 3.14159,
+                                     angle_shape_threshold = 3.14159)
 
-        obj.update_from_editmode()
-        bpy.ops.mesh.subdivide(number_cuts=self.inputs[2].value, smoothness=self.inputs[3].value)
-        obj.update_from_editmode()
-        self.inputs[0].setViewObjectMode()
+        verts, edges, faces = selectVertexGroup(bm, obj, vertexGroup)
+        bmesh.ops.subdivide_edges(bm, edges = edges, cuts = self.inputs[2].value,
+                                  smooth = self.inputs[3].value, use_grid_fill = True)
 
 
     def write_keyframe(self, refholder, frame):
@@ -81,7 +94,3 @@ class SubdivideNode(bpy.types.Node, UMOGOutputNode):
 
     def postBake(self, refholder):
         pass
-
-    def resetNormals(self, objData):
-        objData.use_auto_smooth = False
-        bpy.ops.mesh.customdata_custom_splitnormals_clear()
\ No newline at end of file
@@ -8,6 +8,9 @@ class IntegerNode(bpy.types.Node, UMOGNode):
     bl_label = "Integer"
     assignedType = "Integer"
 
+    hasRuntimeRefresh = True
+    hasConstantOutputs = True
+
     input_value : bpy.props.IntProperty(update=propUpdate)
 
     def create(self):
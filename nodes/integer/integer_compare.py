@@ -8,6 +8,9 @@ class IntegerCompareNode(bpy.types.Node, UMOGNode):
 
     assignedType = "Integer"
 
+    hasRuntimeRefresh = True
+    executeReadsSockets = False
+
     fixed_items : bpy.props.EnumProperty(items=(('0', '>', 'bigger'),
                                                 ('1', '>=', 'bigger_eq'),
                                                 ('2', '<', 'less'),
@@ -28,29 +31,44 @@ class IntegerCompareNode(bpy.types.Node, UMOGNode):
 
     def execute(self, refholder):
         self.applyOperation()
-    
+
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        outputs[0].value = self.calculate(inputs[0].value, inputs[1].value)
+
+    def runtimeExecute(self, inputs, outputs, runtime):
+        # the result was already computed by runtimeRefresh in this substep
+        pass
+
+    def getRuntimeExpression(self):
+        return {'0': "({0} > {1})",
+                '1': "({0} >= {1})",
+                '2': "({0} < {1})",
+                '3': "({0} <= {1})",
+                '4': "({0} == {1})",
+                '5': "({0} != {1})"}[self.fixed_items]
+
     def applyOperation(self):
+        self.outputs[0].value = self.calculate(self.inputs[0].value, self.inputs[1].value)
+        self.outputs[0].name = str(self.outputs[0].value)
+
+    def calculate(self, a, b):
         if self.fixed_items == '0':
-            self.outputs[0].value = self.inputs[0].value > self.inputs[1].value
+            return a > b
 
         elif self.fixed_items == '1':
-            self.outputs[0].value = self.inputs[0].value >= self.inputs[1].value
+            return a >= b
 
         elif self.fixed_items == '2':
-            self.outputs[0].value = self.inputs[0].value < self.inputs[1].value
+            return a < b
 
         elif self.fixed_items == '3':
-            self.outputs[0].value = self.inputs[0].value <= self.inputs[1].value
-
+            return a <= b
 
         elif self.fixed_items == '4':
-            self.outputs[0].value = self.inputs[0].value == self.inputs[1].value
+            return a == b
 
         elif self.fixed_items == '5':
-            self.outputs[0].value = self.inputs[0].value != self.inputs[1].value
-
-
-        self.outputs[0].name = str(self.outputs[0].value)
+            return a != b
 
     def draw(self, layout):
         layout.prop(self, "fixed_items", text='Operation')
@@ -9,6 +9,8 @@ class IntegerFrameNode(bpy.types.Node, UMOGNode):
 
     assignedType = "Integer"
 
+    hasRuntimeRefresh = True
+
     input_value : bpy.props.IntProperty(update=propUpdate)
 
     def create(self):
@@ -25,6 +27,12 @@ class IntegerFrameNode(bpy.types.Node, UMOGNode):
     def refresh(self):
         self.refreshOnFrameChange()
 
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        outputs[0].value = runtime.frame
+
+    def getRuntimeExpression(self):
+        return "runtime.frame"
+
     def refreshOnFrameChange(self):
         self.outputs[0].value = bpy.context.scene.frame_current
         self.outputs[0].name = "Frame: " + str(self.outputs[0].value)
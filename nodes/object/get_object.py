@@ -6,6 +6,9 @@ class GetTextureNode(bpy.types.Node, UMOGNode):
     bl_label = "Object"
     assignedType = "Object"
 
+    hasRuntimeRefresh = True
+    hasConstantOutputs = True
+
     texture : bpy.props.StringProperty()
 
     def create(self):
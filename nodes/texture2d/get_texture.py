@@ -7,6 +7,9 @@ class GetTextureNode(bpy.types.Node, UMOGNode):
     bl_label = "Texture"
     assignedType = "Texture2"
 
+    hasRuntimeRefresh = True
+    hasConstantOutputs = True
+
     texture : bpy.props.StringProperty()
 
     def create(self):
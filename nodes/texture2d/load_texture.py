@@ -33,7 +33,8 @@ class LoadTextureNode(bpy.types.Node, UMOGOutputNode):
         img = bpy.data.images.load(image_path)
         bpy.data.textures[self.texture_name_temp].image = img
         #coerce into np array
-        refholder.fillTexture(self.outputs[0].texture_index, self.texture_name_temp)
+        refholder.fillTexture(self.outputs[0].texture_index, self.texture_name_temp,
+                              self.nodeTree.properties.TextureWorkers)
         bpy.data.textures[self.texture_name_temp].image = None
         bpy.data.images.remove(img)
         print(index)
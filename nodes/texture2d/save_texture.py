@@ -1,6 +1,7 @@
 from ... base_types import UMOGNode
 import bpy
 import numpy as np
+from ...texture.image import writeImagePixels, forgetImage
 
 
 class SaveTextureNode(bpy.types.Node, UMOGNode):
@@ -44,16 +45,16 @@ class SaveTextureNode(bpy.types.Node, UMOGNode):
             image.save()
         except:
             resolution = self.nodeTree.properties.TextureResolution
-            pixels = np.empty((resolution, resolution, 4), dtype = "float")
+            pixels = np.empty((resolution, resolution, 4), dtype = np.float32)
             texture = self.inputs[0].getFromSocket.getTexture()
             self.inputs[0].proceduralToNumpy(texture, pixels, resolution, resolution)
             image = bpy.data.images.new("temp", resolution, resolution, alpha = False,
                              float_buffer = True)
-            image.pixels = pixels.flatten()
-            image.update()
+            writeImagePixels(image, pixels)
             image.filepath_raw = self.file_path + self.file_name + str(self.file_name_diff) + ".png"
             image.file_format = 'PNG'
             image.save()
+            forgetImage(image.name)
             bpy.data.images.remove(image)
         # print(image.source == test.source)
 
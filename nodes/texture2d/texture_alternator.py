@@ -7,6 +7,9 @@ class TextureAlternatorNode(bpy.types.Node, UMOGNode):
 
     assignedType = "Texture2"
 
+    hasRuntimeRefresh = True
+    executeReadsSockets = False
+
     texture : bpy.props.StringProperty()
 
     def create(self):
@@ -27,6 +30,15 @@ class TextureAlternatorNode(bpy.types.Node, UMOGNode):
             self.outputs[0].value = self.inputs[1].value
         self.outputs[0].refresh()
 
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        if inputs[2].value == True:
+            outputs[0].assign(inputs[0])
+        else:
+            outputs[0].assign(inputs[1])
+
+    def getRuntimeExpression(self):
+        return "({0} if {2} == True else {1})"
+
     def execute(self, refholder):
         pass
         # try:
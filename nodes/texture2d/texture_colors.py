@@ -7,6 +7,9 @@ class TextureColorsNode(bpy.types.Node, UMOGNode):
 
     assignedType = "Texture2"
 
+    hasRuntimeRefresh = True
+    executeReadsSockets = False
+
     def create(self):
         self.width = 220
         self.newInput(self.assignedType, "Texture")
@@ -44,6 +47,9 @@ class TextureColorsNode(bpy.types.Node, UMOGNode):
         self.outputs[0].value = self.inputs[0].value
         self.outputs[0].refresh()
 
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        outputs[0].assign(inputs[0])
+
     def execute(self, refholder):
         pass
         # try:
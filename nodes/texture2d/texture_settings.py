@@ -7,6 +7,9 @@ class TextureSettingsNode(bpy.types.Node, UMOGNode):
 
     assignedType = "Texture2"
 
+    hasRuntimeRefresh = True
+    executeReadsSockets = False
+
     def create(self):
         self.width = 220
         self.newInput(self.assignedType, "Texture")
@@ -48,6 +51,9 @@ class TextureSettingsNode(bpy.types.Node, UMOGNode):
         self.outputs[0].value = self.inputs[0].value
         self.outputs[0].refresh()
 
+    def runtimeRefresh(self, inputs, outputs, runtime):
+        outputs[0].assign(inputs[0])
+
     def drawBlend(self, tex, layout):
         layout.prop(tex, "progression")
 
@@ -1,4 +1,6 @@
 from ..node_tree import UMOGReferenceHolder
+from ..bake.progress import BakeProgress, activeBakes, formatDuration
+from ..bake.checkpoint import loadLatestCheckpoint
 import bpy
 import time
 
@@ -10,17 +12,102 @@ class UMOGBakeOp(bpy.types.Operator):
     bl_options = {"REGISTER", "UNDO"}
 
     tree : bpy.props.StringProperty()
+    resume : bpy.props.BoolProperty(default = False,
+        description = "Continue the bake from its latest checkpoint")
 
     def execute(self, context):
         # test = self.tree
         node_tree = bpy.data.node_groups[self.tree]
-        
+        checkpoint = self.getCheckpoint(node_tree)
+        if checkpoint is False:
+            return {"CANCELLED"}
+
         start_time = time.time()
 
         refholder = UMOGReferenceHolder()
-        node_tree.execute(refholder)
-                
+        node_tree.execute(refholder, checkpoint = checkpoint)
+
         diff_time = time.time() - start_time
         print("[GrowthNodes] Baking process took " + str(diff_time) + " seconds.")
-        
+
         return {"FINISHED"}
+
+    # Interactive bakes run in a modal operator that bakes a few frames on
+    # every timer event, so the interface keeps redrawing and Esc cancels.
+    def invoke(self, context, event):
+        if self.tree in activeBakes:
+            self.report({'WARNING'}, self.tree + " is already baking")
+            return {"CANCELLED"}
+
+        node_tree = bpy.data.node_groups[self.tree]
+        props = node_tree.properties
+        checkpoint = self.getCheckpoint(node_tree)
+        if checkpoint is False:
+            return {"CANCELLED"}
+
+        self.frames = node_tree.bakeFrames(UMOGReferenceHolder(), checkpoint)
+        startFrame = props.StartFrame if checkpoint is None else checkpoint.frame + 1
+        self.progress = BakeProgress(startFrame, props.EndFrame)
+        activeBakes[self.tree] = self.progress
+
+        windowManager = context.window_manager
+        windowManager.progress_begin(0, self.progress.totalFrames)
+        self.timer = windowManager.event_timer_add(0.001, window = context.window)
+        windowManager.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.progress.cancelled = True
+            self.finish(context)
+            self.report({'WARNING'}, "Bake cancelled at frame {}".format(self.progress.frame))
+            return {"CANCELLED"}
+
+        if event.type != 'TIMER' or event.timer != self.timer:
+            return {"PASS_THROUGH"}
+
+        framesPerTick = bpy.data.node_groups[self.tree].properties.FramesPerTick
+        try:
+            for i in range(framesPerTick):
+                self.progress.update(next(self.frames))
+        except StopIteration:
+            self.finish(context)
+            print("[GrowthNodes] Baking process took " + formatDuration(self.progress.elapsed) + ".")
+            return {"FINISHED"}
+        except Exception:
+            self.finish(context)
+            raise
+
+        context.window_manager.progress_update(self.progress.bakedFrames)
+        redrawBakePanels(context)
+        return {"RUNNING_MODAL"}
+
+    def getCheckpoint(self, node_tree):
+        '''The checkpoint to resume from, None for a new bake, False on error'''
+        if not self.resume:
+            return None
+
+        checkpoint = loadLatestCheckpoint(node_tree)
+        if checkpoint is None:
+            self.report({'ERROR'}, "No checkpoint to resume " + self.tree + " from")
+            return False
+        problem = checkpoint.getProblem(node_tree)
+        if problem is not None:
+            self.report({'ERROR'}, problem)
+            return False
+        return checkpoint
+
+    def finish(self, context):
+        # closing the generator runs the cleanup and postBake of the tree
+        self.frames.close()
+        windowManager = context.window_manager
+        windowManager.event_timer_remove(self.timer)
+        windowManager.progress_end()
+        activeBakes.pop(self.tree, None)
+        redrawBakePanels(context)
+
+
+def redrawBakePanels(context):
+    for area in context.screen.areas:
+        if area.type in ('NODE_EDITOR', 'VIEW_3D'):
+            area.tag_redraw()
@@ -1,5 +1,5 @@
 import bpy
-from .. utils.debug import *
+from .. utils.trace import tracer
 from .. utils.names import getRandomString
 from .. utils.nodes import idToNode, idToSocket
 
@@ -8,16 +8,13 @@ callbackByIdentifier = {}
 def newCallback(function):
     identifier = getRandomString(10)
     callbackByIdentifier[identifier] = function
-    DBG(identifier, function, TRACE = False)
     return identifier
 
 def insertCallback(identifier, function):
     callbackByIdentifier[identifier] = function
-    DBG(identifier, function, TRACE = False)
     return identifier
 
 def newParameterizedCallback(identifier, *parameters):
-    DBG("#" + repr((identifier, parameters)), TRACE = False)
     return "#" + repr((identifier, parameters))
 
 def executeCallback(identifier, *args, **kwargs):
@@ -26,12 +23,10 @@ def executeCallback(identifier, *args, **kwargs):
     if identifier.startswith("#"):
         realIdentifier, parameters = eval(identifier[1:])
         callback = callbackByIdentifier[realIdentifier]
-        DBG(callback, realIdentifier, parameters, args, kwargs, TRACE = False)
-        callback(*parameters, args, kwargs)
+        tracer.call("callback", callback, callback, *parameters, args, kwargs)
     else:
         callback = callbackByIdentifier[identifier]
-        DBG(callback, identifier, args, kwargs, TRACE = False)
-        callback(*args, **kwargs)
+        tracer.call("callback", callback, callback, *args, **kwargs)
 
 
 
@@ -44,8 +39,7 @@ def executeNodeCallback(nodeID, functionName, args, kwargs):
     if node is None:
         print("Node not found:", nodeID)
         return
-    DBG(node, functionName, *args, **kwargs)
-    getattr(node, functionName)(*args, **kwargs)
+    tracer.call(functionName, node.name, getattr(node, functionName), *args, **kwargs)
 
 def executeSocketCallback(socketID, functionName, args, kwargs):
     try: socket = idToSocket(socketID)
@@ -0,0 +1,41 @@
+import bpy
+from bpy_extras.io_utils import ExportHelper
+from ..utils.profiler import lastProfiles
+from ..utils.trace import tracer
+
+
+class UMOGExportProfileOp(bpy.types.Operator, ExportHelper):
+    """Export the node timings of the last profiled bake as JSON"""
+    bl_idname = 'umog.export_profile'
+    bl_label = 'Export Bake Profile'
+
+    filename_ext = ".json"
+    filter_glob : bpy.props.StringProperty(default = "*.json", options = {'HIDDEN'})
+
+    tree : bpy.props.StringProperty()
+
+    def execute(self, context):
+        profiler = lastProfiles.get(self.tree)
+        if profiler is None:
+            self.report({'ERROR'}, "No profiled bake for " + self.tree)
+            return {"CANCELLED"}
+
+        profiler.exportJSON(self.filepath)
+        return {"FINISHED"}
+
+
+class UMOGExportTraceOp(bpy.types.Operator, ExportHelper):
+    """Export the recorded trace events in the Chrome trace format"""
+    bl_idname = 'umog.export_trace'
+    bl_label = 'Export Trace'
+
+    filename_ext = ".json"
+    filter_glob : bpy.props.StringProperty(default = "*.json", options = {'HIDDEN'})
+
+    def execute(self, context):
+        if tracer.count == 0:
+            self.report({'ERROR'}, "No trace events recorded")
+            return {"CANCELLED"}
+
+        tracer.exportJSON(self.filepath)
+        return {"FINISHED"}
@@ -2,22 +2,50 @@ import os
 import sys
 import bpy
 from bpy.props import *
+from .utils.trace import developerFlags
 
 currentFileDirectory = os.path.dirname(__file__)
 addonName = os.path.basename(os.path.dirname(__file__))
 
+def updateDeveloperSettings(self, context):
+    developerFlags.update(self)
+
 class DeveloperProperties(bpy.types.PropertyGroup):
     bl_idname = "umog_DeveloperProperties"
 
     executionInfo : BoolProperty(name = "Execution Info", default = False,
-        description = "Enable informative print statements")
+        description = "Enable informative print statements", update = updateDeveloperSettings)
     traceInfo : BoolProperty(name = "Trace Info", default = False,
-        description = "Enable selective traceback statements")
+        description = "Enable selective traceback statements", update = updateDeveloperSettings)
+    traceEvents : BoolProperty(name = "Record Trace", default = False,
+        description = "Record socket refreshes, tree updates, callbacks and handlers for a trace viewer",
+        update = updateDeveloperSettings)
+    traceBufferSize : IntProperty(name = "Trace Events", default = 65536, min = 1024,
+        description = "Number of recorded events kept; older events are overwritten",
+        update = updateDeveloperSettings)
+
+class PlaybackProperties(bpy.types.PropertyGroup):
+    bl_idname = "umog_PlaybackProperties"
+
+    memoryBudget : IntProperty(name = "Playback Memory (MB)", default = 512, min = 16,
+        description = "Memory used to keep decoded frames of frame caches for scrubbing")
+
+class TextureCacheProperties(bpy.types.PropertyGroup):
+    bl_idname = "umog_TextureCacheProperties"
+
+    memoryBudget : IntProperty(name = "Texture Memory (MB)", default = 1024, min = 16,
+        description = "Memory used to keep evaluated textures between bakes")
+    cacheDirectory : StringProperty(name = "Texture Cache", default = "", subtype = "DIR_PATH",
+        description = "Directory keeping evaluated textures on disk, empty keeps them only in memory")
+    bufferBudget : IntProperty(name = "Texture Buffers (MB)", default = 2048, min = 64,
+        description = "Memory for the textures of running bakes; unused pooled buffers are freed above it")
 
 class AddonPreferences(bpy.types.AddonPreferences):
     bl_idname = addonName
 
     developer : PointerProperty(type = DeveloperProperties)
+    playback : PointerProperty(type = PlaybackProperties)
+    textureCache : PointerProperty(type = TextureCacheProperties)
 
     def draw(self, context):
         layout = self.layout
@@ -27,6 +55,15 @@ class AddonPreferences(bpy.types.AddonPreferences):
         col = row.column(align = True)
         col.prop(self.developer, "executionInfo")
         col.prop(self.developer, "traceInfo")
+        col.prop(self.developer, "traceEvents")
+        col.prop(self.developer, "traceBufferSize")
+        col.operator("umog.export_trace", icon = "EXPORT")
+
+        col = row.column(align = True)
+        col.prop(self.playback, "memoryBudget")
+        col.prop(self.textureCache, "memoryBudget")
+        col.prop(self.textureCache, "cacheDirectory", text = "")
+        col.prop(self.textureCache, "bufferBudget")
 
 def getPreferences():
     return bpy.context.preferences.addons[addonName].preferences
@@ -34,6 +71,12 @@ def getPreferences():
 def getDeveloperSettings():
     return getPreferences().developer
 
+def getPlaybackSettings():
+    return getPreferences().playback
+
+def getTextureSettings():
+    return getPreferences().textureCache
+
 def getBlenderVersion():
     return bpy.app.version
 
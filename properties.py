@@ -8,6 +8,12 @@ bpy.types.Object.bakeCount = bpy.props.IntProperty(
 
 bpy.types.Mesh.bakedKeys = {}
 
+bpy.types.Object.umogCacheDirectory = bpy.props.StringProperty(
+    name = "Cache Directory",
+    description = "Frame cache streamed into the mesh on frame changes",
+    default = "",
+    subtype = "DIR_PATH")
+
 bpy.types.Object.hasUMOGBaked = bpy.props.BoolProperty(
     name = "hasUMOGBaked", 
     description = "hasUMOGBaked",
@@ -43,3 +43,12 @@ class BooleanSocket(bpy.types.NodeSocket, UMOGSocket):
 
     def getProperty(self):
         return self.value
+
+    def getRuntimeConverter(self):
+        def convert(data):
+            if type(data) is bool:
+                return data
+            elif type(data) is str:
+                return int(data) > 0
+            return data > 0
+        return convert
@@ -55,6 +55,12 @@ class FloatSocket(bpy.types.NodeSocket, UMOGSocket):
     def getProperty(self):
         return self.value
 
+    def getRuntimeConverter(self):
+        minValue, maxValue = self.minValue, self.maxValue
+        def convert(data):
+            return min(max(minValue, float(data)), maxValue)
+        return convert
+
     def setRange(self, min, max):
         self.minValue = min
         self.maxValue = max
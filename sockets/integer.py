@@ -58,6 +58,12 @@ class IntegerSocket(bpy.types.NodeSocket, UMOGSocket):
     def getProperty(self):
         return self.value
 
+    def getRuntimeConverter(self):
+        minValue, maxValue = self.minValue, self.maxValue
+        def convert(data):
+            return int(min(max(minValue, int(data)), maxValue))
+        return convert
+
     def setRange(self, min, max):
         self.minValue = min
         self.maxValue = max
@@ -44,48 +44,3 @@ class ObjectSocket(bpy.types.NodeSocket, UMOGSocket):
 
     def getObject(self):
         return bpy.data.objects[self.value]
-
-    def setSelected(self):
-        self.setViewObjectMode()
-        
-        for obj in bpy.data.objects:
-            obj.select_set(False)
-
-        obj = self.getObject()
-
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
-
-    def getCustomContext(self):
-        for win in bpy.context.window_manager.windows:
-            scr = win.screen
-            areas3d = [area for area in scr.areas if area.type == 'VIEW_3D']
-            region = [region for region in areas3d[0].regions if region.type == 'WINDOW']
-            if len(areas3d) > 0 or len(region) > 0:
-                break
-
-        if len(areas3d) is 0:
-            raise Exception("Execution requires a 3D View region")
-
-        override = {
-            'window': win,
-            'screen': scr,
-            'area': areas3d[0],
-            'region': region[0],
-            'scene': bpy.context.scene,
-        }
-
-        return override
-
-    def setViewEditMode(self, selectAll = False):
-        override = self.getCustomContext()
-        
-        bpy.ops.object.mode_set(mode='EDIT')    
-        if selectAll is not False:
-            bpy.ops.mesh.select_all(action=selectAll)
-            obj = self.getObject()
-            obj.update_from_editmode()
-        return override
-
-    def setViewObjectMode(self):       
-        bpy.ops.object.mode_set(mode='OBJECT')
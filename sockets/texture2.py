@@ -6,13 +6,11 @@ import numpy as np
 from bpy.props import *
 from ..base_types import UMOGSocket
 from ..utils.events import propUpdate
-
-
-class UMOGTextureData(dict):
-    bl_idname = "umog_TextureData"
-
-    def __init__(self):
-        pass
+from ..texture.procedural import evaluateTexture
+from ..texture.cache import getCachedPixels
+from ..texture.buffers import textureBuffers
+from ..texture.image import (readImagePixels, resamplePixels, toRGBA,
+                             writeImagePixels, writeImageChannel, forgetImage)
 
 
 class Texture2Socket(bpy.types.NodeSocket, UMOGSocket):
@@ -32,8 +30,6 @@ class Texture2Socket(bpy.types.NodeSocket, UMOGSocket):
 
     value : StringProperty(update = propUpdate)
 
-    data = UMOGTextureData()
-
     def drawProperty(self, context, layout, layoutParent, text, node):
         layout.prop_search(self, "value", bpy.data, "textures", icon = "TEXTURE_DATA",
                            text = "")
@@ -58,6 +54,7 @@ class Texture2Socket(bpy.types.NodeSocket, UMOGSocket):
 
         if textureName in D.images:
             D.images.remove(D.images[textureName])
+        forgetImage(textureName)
 
         image = D.images.new(textureName, resolution, resolution, alpha = False,
                              float_buffer = True)
@@ -65,88 +62,83 @@ class Texture2Socket(bpy.types.NodeSocket, UMOGSocket):
         texture.image = image
         self.value = texture.name
 
+    @property
+    def bufferKey(self):
+        return (self.nodeTree.name, self.node.name, self.identifier)
+
     def packInputData(self, resolution):
+        self.setPixels(self.evaluatePixels(resolution))
+
+    def evaluatePixels(self, resolution):
+        '''
+        Returns the linked texture as a read-only resolution*resolution array.
+        Procedurals and single channel images have one gray channel, other
+        images are RGBA. The dtype follows the Texture Precision of the tree.
+        '''
+        props = self.nodeTree.properties
+        fromTexture = self.getTexture()
+        dtype = np.float16 if props.TexturePrecision == "FLOAT16" else np.float32
+        # procedurals are gray, images depend on the resampling
+        if fromTexture.type == "IMAGE":
+            image = fromTexture.image
+            channels = 1 if image is not None and image.channels == 1 else 4
+            variant = "IMAGE {} {}".format(props.ImageFilter, channels)
+        else:
+            channels = 1
+            variant = "INTENSITY"
+        variant += " " + np.dtype(dtype).name
+
+        return getCachedPixels(fromTexture, resolution, variant,
+            lambda: self.evaluateUncached(fromTexture, resolution, channels, dtype))
+
+    def evaluateUncached(self, fromTexture, resolution, channels = 4, dtype = np.float32):
         rows = resolution
         columns = resolution
-        # TODO: Fix harcoded channel attr
-        pixels = np.empty((rows, columns, 4), dtype = "float")
-        fromTexture = self.getTexture()
+        pixels = np.empty((rows, columns, channels), dtype = dtype)
 
         if fromTexture.type != "IMAGE":
             self.proceduralToNumpy(fromTexture, pixels, rows, columns)
         else:
             self.imageToNumpy(fromTexture, pixels, rows, columns)
 
-        self.data[self.identifier] = pixels
+        return pixels
 
     def proceduralToNumpy(self, fromTexture, pixels, rows, columns):
-        for i in range(rows):
-            for j in range(columns):
-                # Mapping from -1 to 1 for evaluate
-                x = (i / rows) * 2 - 1
-                y = (j / columns) * 2 - 1
-                w = fromTexture.evaluate((y, x, 0)).w
-                pixels[i, j][0] = w
-                pixels[i, j][1] = w
-                pixels[i, j][2] = w
-                pixels[i, j][3] = 1.0
-
-        return pixels
+        workers = self.nodeTree.properties.TextureWorkers
+        return evaluateTexture(fromTexture, pixels, intensity = True, workers = workers)
 
     def imageToNumpy(self, fromTexture, pixels, rows, columns):
-        fromImage = fromTexture.image
-        fromRows = fromImage.size[1]
-        fromColumns = fromImage.size[0]
-        fromPixels = np.asarray(fromImage.pixels, dtype = "float")
-        fromPixels = fromPixels.reshape(fromRows, fromColumns, fromImage.channels)
-
-        for i in range(rows):
-            for j in range(columns):
-                # Scale image to resolution*resolution
-                x = int(i * (fromRows / rows))
-                y = int(j * (fromColumns / columns))
-                pixels[i, j][0] = fromPixels[x, y][0]
-                pixels[i, j][1] = fromPixels[x, y][1]
-                pixels[i, j][2] = fromPixels[x, y][2]
-                pixels[i, j][3] = fromPixels[x, y][3]
-
-        return pixels
+        fromPixels = readImagePixels(fromTexture.image)
+        # Scale image to resolution*resolution
+        fromPixels = resamplePixels(fromPixels, rows, columns,
+                                    self.nodeTree.properties.ImageFilter)
+        if pixels.shape[2] == 1:
+            pixels[:, :, 0] = fromPixels[:, :, 0]
+            return pixels
+        return toRGBA(fromPixels, pixels)
 
     def setPackedImageFromPixels(self, newPixels, flatten=True):
         if self.isOutput and self.isPacked:
-            texture = self.getTexture()
-            image = texture.image
-            if flatten:
-                image.pixels = newPixels.flatten()
-            else:
-                image.pixels = newPixels
-            image.update()
+            writeImagePixels(self.getTexture().image, newPixels)
 
         else:
             assert(False)
 
     def setPackedImageFromChannels(self, newPixels, channel, flatten=True):
         if self.isOutput and self.isPacked:
-            texture = self.getTexture()
-            image = texture.image
-            npImage = np.asarray(image.pixels, dtype = "float")
-            npImage = npImage.reshape(image.size[0], image.size[0], image.channels)
-            npImage[:,:,channel] = newPixels
-            if flatten:
-                image.pixels = npImage.flatten()
-            else:
-                image.pixels = npImage
-            image.update()
+            writeImageChannel(self.getTexture().image, channel, newPixels)
 
         elif self.isInput and self.isPacked:
-            self.data[self.identifier][:,:,channel] = newPixels
+            # copies pixels shared with the texture cache or other sockets
+            pixels = textureBuffers.makeWritable(self.bufferKey, channel + 1)
+            pixels[:,:,channel] = newPixels
             
 
     def setPixels(self, newPixels):
-        self.data[self.identifier] = newPixels
+        textureBuffers.assign(self.bufferKey, newPixels)
 
     def getPixels(self):
-        return self.data[self.identifier]
+        return textureBuffers.get(self.bufferKey)
 
     def getValue(self):
         return self.value
@@ -164,5 +156,5 @@ class Texture2Socket(bpy.types.NodeSocket, UMOGSocket):
         return bpy.data.textures[self.value]
 
     def destroy(self):
-        if self.isPacked and self.identifier in self.data:
-            del self.data[self.identifier]
+        if self.isPacked:
+            textureBuffers.release(self.bufferKey)
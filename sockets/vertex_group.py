@@ -5,6 +5,7 @@ import types
 from bpy.props import *
 from ..base_types import UMOGSocket
 from ..utils.events import propUpdate
+from ..mesh import weights
 
 
 class VertexGroupSocket(bpy.types.NodeSocket, UMOGSocket):
@@ -42,6 +43,13 @@ class VertexGroupSocket(bpy.types.NodeSocket, UMOGSocket):
     def getProperty(self):
         return self.value
 
+    def getComparableValue(self):
+        return (self.object, self.value)
+
+    def setRuntimeProperty(self, value, object):
+        self.object = object
+        self.value = value
+
     def refresh(self):
         self.name = self.value
 
@@ -51,66 +59,27 @@ class VertexGroupSocket(bpy.types.NodeSocket, UMOGSocket):
     def setObject(self, data):
         self.object = data
 
+    def setWeights(self, data):
+        '''Carry per vertex weights in memory instead of writing the vertex group'''
+        weights.setWeights(self.object, self.value, data)
+
+    def getWeights(self):
+        '''float32 weight per vertex, None if the group doesn't exist'''
+        return weights.getWeights(self.getObject(), self.value)
+
+    def getMask(self):
+        return weights.getMask(self.getObject(), self.value)
+
+    @property
+    def hasWeights(self):
+        return weights.hasWeights(self.object, self.value)
+
+    def materialize(self):
+        if self.object != '' and self.value != '':
+            weights.materialize(self.getObject(), self.value)
+
     def getVertexGroup(self):
         return self.getObject().vertex_groups[self.value]
 
     def setVertexGroupActive(self):
         self.getObject().vertex_groups.active_index = self.getVertexGroup().index
-
-    def setSelected(self):
-        self.setViewObjectMode()
-        
-        for obj in bpy.data.objects:
-            obj.select_set(False)
-
-        obj = self.getObject()
-
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
-
-    def getCustomContext(self):
-        win = bpy.context.window
-        scr = win.screen
-        areas3d = [area for area in scr.areas if area.type == 'VIEW_3D']
-        region = [region for region in areas3d[0].regions if region.type == 'WINDOW']
-
-        if len(areas3d) is 0:
-            raise Exception("Execution requires a 3D View region")
-
-        override = {
-            'window': win,
-            'screen': scr,
-            'area': areas3d[0],
-            'region': region[0],
-            'scene': bpy.context.scene,
-        }
-
-        return override
-
-    def select(self):
-        if self.object != '':
-            override = self.getCustomContext()
-            
-            bpy.ops.object.mode_set(mode='EDIT')  
-            bpy.ops.mesh.select_all(override, action='DESELECT')
-
-            object = self.getObject()
-            thisVertexGroup = self.getVertexGroup()
-
-            self.setVertexGroupActive()
-            bpy.ops.object.vertex_group_select()
-
-            return override
-
-    def setViewEditMode(self, selectAll = False):
-        override = self.getCustomContext()
-        
-        bpy.ops.object.mode_set(mode='EDIT')    
-        if selectAll is not False:
-            bpy.ops.mesh.select_all(action=selectAll)
-            obj = self.getObject()
-            obj.update_from_editmode()
-        return override
-
-    def setViewObjectMode(self):       
-        bpy.ops.object.mode_set(mode='OBJECT')
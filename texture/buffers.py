@@ -0,0 +1,166 @@
+import numpy as np
+
+# Memory of the texture arrays used during bakes.
+#
+# Packed Texture2 sockets hold their pixels through handles keyed by
+# (tree, node, socket). Sockets packing the same cached array share one
+# refcounted handle, so it is only counted once, and all handles of a tree
+# are released when its bake ends.
+#
+# Per-frame intermediates (reference holder textures, evaluation buffers)
+# are borrowed from a pool of arrays by shape and dtype and given back
+# afterwards, so frames reuse the same memory. Pooled arrays are dropped
+# first when the buffers exceed the memory budget of the addon preferences.
+
+
+class TextureHandle:
+    def __init__(self, pixels, pooled):
+        self.pixels = pixels
+        # pooled arrays go back to the pool when the last reference is released
+        self.pooled = pooled
+        self.references = 0
+
+
+class TextureBufferManager:
+    def __init__(self, memoryBudget = 2048 * 1024 ** 2):
+        self.memoryBudget = memoryBudget
+        # key -> TextureHandle
+        self.handles = {}
+        # id of the pixels -> TextureHandle, to share handles of the same array
+        self.handlesByArray = {}
+        # (shape, dtype) -> unused arrays
+        self.pool = {}
+        # bytes of the shared arrays held by handles, of the borrowed arrays
+        # and of the unused arrays in the pool
+        self.liveBytes = 0
+        self.borrowedBytes = 0
+        self.pooledBytes = 0
+        self.peakBytes = 0
+        self.allocations = 0
+        self.reuses = 0
+        self.warned = False
+
+    def assign(self, key, pixels, pooled = False):
+        '''Makes key refer to pixels, releasing what it referred to before'''
+        handle = self.handlesByArray.get(id(pixels))
+        if handle is not None and self.handles.get(key) is handle:
+            return handle
+
+        self.release(key)
+        if handle is None:
+            handle = TextureHandle(pixels, pooled)
+            self.handlesByArray[id(pixels)] = handle
+            if not pooled:
+                self.liveBytes += pixels.nbytes
+                self.updatePeak()
+        handle.references += 1
+        self.handles[key] = handle
+        return handle
+
+    def get(self, key):
+        return self.handles[key].pixels
+
+    def has(self, key):
+        return key in self.handles
+
+    def release(self, key):
+        handle = self.handles.pop(key, None)
+        if handle is None:
+            return
+        handle.references -= 1
+        if handle.references == 0:
+            del self.handlesByArray[id(handle.pixels)]
+            if handle.pooled:
+                self.giveBack(handle.pixels)
+            else:
+                self.liveBytes -= handle.pixels.nbytes
+
+    def releaseTree(self, treeName):
+        for key in [key for key in self.handles if key[0] == treeName]:
+            self.release(key)
+        self.warned = False
+
+    def makeWritable(self, key, channels):
+        '''
+        Pixels of key that can be changed in place and have at least the given
+        channels. Shared or read-only pixels are copied into a pooled array;
+        gray pixels always become RGBA, a written channel mustn't change the
+        gray value of the others.
+        '''
+        handle = self.handles[key]
+        pixels = handle.pixels
+        rows, columns, oldChannels = pixels.shape
+        if (pixels.flags.writeable and handle.references == 1 and
+                oldChannels >= channels and oldChannels != 1):
+            return pixels
+
+        if oldChannels == 1:
+            # gray widens to RGBA, gray in RGB with alpha 1
+            copy = self.borrow((rows, columns, 4), pixels.dtype)
+            copy[:, :, :3] = pixels
+            copy[:, :, 3] = 1.0
+        else:
+            copy = self.borrow((rows, columns, max(oldChannels, channels)), pixels.dtype)
+            copy[:, :, :oldChannels] = pixels
+            copy[:, :, oldChannels:] = 1.0
+        self.assign(key, copy, pooled = True)
+        return copy
+
+    def borrow(self, shape, dtype = np.float32):
+        '''An uninitialized array from the pool, see giveBack'''
+        dtype = np.dtype(dtype)
+        arrays = self.pool.get((shape, dtype))
+        if arrays:
+            pixels = arrays.pop()
+            self.pooledBytes -= pixels.nbytes
+            self.reuses += 1
+        else:
+            size = int(np.prod(shape)) * dtype.itemsize
+            self.trim(self.memoryBudget - size)
+            self.checkBudget(size)
+            pixels = np.empty(shape, dtype = dtype)
+            self.allocations += 1
+        self.borrowedBytes += pixels.nbytes
+        self.updatePeak()
+        return pixels
+
+    def giveBack(self, pixels):
+        self.borrowedBytes -= pixels.nbytes
+        self.pool.setdefault((pixels.shape, pixels.dtype), []).append(pixels)
+        self.pooledBytes += pixels.nbytes
+        self.trim(self.memoryBudget)
+
+    @property
+    def usedBytes(self):
+        return self.liveBytes + self.borrowedBytes
+
+    def trim(self, limit):
+        '''Drops pooled arrays until all buffers fit into limit bytes'''
+        for key in list(self.pool):
+            arrays = self.pool[key]
+            while arrays and self.usedBytes + self.pooledBytes > limit:
+                self.pooledBytes -= arrays.pop().nbytes
+            if not arrays:
+                del self.pool[key]
+
+    def checkBudget(self, size):
+        # textures in use can't be dropped, only reported
+        if self.usedBytes + size > self.memoryBudget and not self.warned:
+            self.warned = True
+            print("[GrowthNodes] Textures use {:.0f} MB, more than the budget of {:.0f} MB".format(
+                (self.usedBytes + size) / 1024 ** 2, self.memoryBudget / 1024 ** 2))
+
+    def updatePeak(self):
+        self.peakBytes = max(self.peakBytes, self.usedBytes + self.pooledBytes)
+
+    def clearPool(self):
+        self.trim(0)
+
+    def getStats(self):
+        return {"handles": len(self.handlesByArray), "liveBytes": self.liveBytes,
+                "borrowedBytes": self.borrowedBytes, "pooledBytes": self.pooledBytes,
+                "peakBytes": self.peakBytes, "memoryBudget": self.memoryBudget,
+                "allocations": self.allocations, "reuses": self.reuses}
+
+
+textureBuffers = TextureBufferManager()
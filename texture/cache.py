@@ -0,0 +1,189 @@
+import os
+import bpy
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from ..preferences import getTextureSettings
+
+# Content addressed cache of evaluated textures.
+#
+# The key hashes everything the pixels depend on: the texture type and its
+# editable RNA properties, the color ramp, the identity of the source image
+# file and the resolution and layout of the result. Sockets using the same
+# texture share one array, and bakes after changes elsewhere in the tree
+# don't evaluate their textures again. Cached arrays are read-only.
+#
+# Entries live in an LRU limited by the memory budget of the addon
+# preferences. With a cache directory they are also stored as .npy files,
+# which survive restarts of Blender. Depsgraph updates of textures and
+# images evict the entries that were built from the old data.
+
+# properties that don't change the evaluated pixels
+ignoredProperties = {"name", "use_fake_user", "tag", "use_extra_user"}
+
+
+class TextureCache:
+    def __init__(self, memoryBudget = 1024 * 1024 ** 2, directory = ""):
+        self.memoryBudget = memoryBudget
+        self.directory = directory
+        # key -> read-only pixels
+        self.entries = OrderedDict()
+        self.cachedBytes = 0
+        # texture and image names -> keys built from them
+        self.keysByName = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        pixels = self.entries.get(key)
+        if pixels is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return pixels
+
+        pixels = self.load(key)
+        if pixels is not None:
+            self.remember(key, pixels)
+            self.hits += 1
+            return pixels
+
+        self.misses += 1
+        return None
+
+    def put(self, key, pixels, names = ()):
+        pixels.flags.writeable = False
+        self.remember(key, pixels)
+        for name in names:
+            self.keysByName.setdefault(name, set()).add(key)
+        self.store(key, pixels)
+
+    def remember(self, key, pixels):
+        if pixels.nbytes > self.memoryBudget or key in self.entries:
+            return
+        self.entries[key] = pixels
+        self.cachedBytes += pixels.nbytes
+        while self.cachedBytes > self.memoryBudget:
+            _, evicted = self.entries.popitem(last = False)
+            self.cachedBytes -= evicted.nbytes
+
+    def load(self, key):
+        if self.directory == "":
+            return None
+        path = os.path.join(self.directory, key + ".npy")
+        if not os.path.isfile(path):
+            return None
+        pixels = np.load(path)
+        pixels.flags.writeable = False
+        return pixels
+
+    def store(self, key, pixels):
+        if self.directory == "":
+            return
+        os.makedirs(self.directory, exist_ok = True)
+        path = os.path.join(self.directory, key + ".npy")
+        # readers never see a partly written file
+        with open(path + ".tmp", "wb") as npyFile:
+            np.save(npyFile, pixels)
+        os.replace(path + ".tmp", path)
+
+    def discard(self, name):
+        '''Evicts the in-memory entries built from the texture or image name'''
+        for key in self.keysByName.pop(name, ()):
+            pixels = self.entries.pop(key, None)
+            if pixels is not None:
+                self.cachedBytes -= pixels.nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.keysByName.clear()
+        self.cachedBytes = 0
+
+
+textureCache = TextureCache()
+
+
+def getCachedPixels(texture, resolution, variant, evaluate):
+    '''
+    Returns the cached pixels of texture, calls evaluate() to create them
+    on a miss. variant names the layout and settings of the result.
+    '''
+    settings = getTextureSettings()
+    textureCache.memoryBudget = settings.memoryBudget * 1024 ** 2
+    textureCache.directory = bpy.path.abspath(settings.cacheDirectory)
+
+    key = getTextureKey(texture, resolution, variant)
+    if key is None:
+        return evaluate()
+
+    pixels = textureCache.get(key)
+    if pixels is None:
+        pixels = evaluate()
+        names = [texture.name]
+        if getattr(texture, "image", None) is not None:
+            names.append(texture.image.name)
+        textureCache.put(key, pixels, names)
+    return pixels
+
+
+def getTextureKey(texture, resolution, variant):
+    '''Hash of everything the pixels of texture depend on, None if that isn't known'''
+    if texture.use_nodes:
+        return None
+
+    parts = [texture.type, resolution, variant, readRNAValues(texture)]
+    if texture.use_color_ramp:
+        ramp = texture.color_ramp
+        parts.append((ramp.interpolation, ramp.color_mode, ramp.hue_interpolation,
+                      [(element.position, tuple(element.color)) for element in ramp.elements]))
+
+    if texture.type == 'IMAGE':
+        if texture.image is None:
+            return None
+        identity = getImageIdentity(texture.image)
+        if identity is None:
+            return None
+        parts.append(identity)
+
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def readRNAValues(struct):
+    values = []
+    for prop in struct.bl_rna.properties:
+        if prop.is_readonly or prop.identifier in ignoredProperties:
+            continue
+        if prop.type in ('POINTER', 'COLLECTION'):
+            continue
+        value = getattr(struct, prop.identifier)
+        if isinstance(value, set):
+            value = sorted(value)
+        elif prop.type in ('BOOLEAN', 'INT', 'FLOAT') and prop.array_length > 0:
+            value = tuple(value)
+        values.append((prop.identifier, value))
+    return values
+
+
+def getImageIdentity(image):
+    '''
+    Identifies the pixel data of file images by path, size and modification
+    time and of packed images by their content. Generated and edited images
+    change without a trace, they aren't cached.
+    '''
+    if image.is_dirty:
+        return None
+    settings = (image.colorspace_settings.name, image.alpha_mode, tuple(image.size))
+
+    if image.packed_file is not None:
+        # a repacked file can keep its size, and the disk tier outlives the session
+        digest = hashlib.sha1(image.packed_file.data).hexdigest()
+        return ("PACKED", image.packed_file.size, digest, settings)
+
+    if image.source != 'FILE':
+        return None
+    path = bpy.path.abspath(image.filepath, library = image.library)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return ("FILE", os.path.normpath(path), stat.st_size, stat.st_mtime_ns, settings)
+
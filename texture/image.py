@@ -0,0 +1,126 @@
+import numpy as np
+
+# Image pixels as numpy arrays.
+#
+# image.pixels is read with foreach_get straight into a float32 buffer, the
+# RNA sequence is never converted element by element. Resampling to the
+# texture resolution works with index arrays along each axis, so non-square
+# sources and any number of channels are handled the same way.
+
+
+def readImagePixels(image, out = None):
+    '''Returns the (rows, columns, channels) float32 pixels of image'''
+    columns, rows = image.size
+    shape = (rows, columns, image.channels)
+    if out is None or out.shape != shape or out.dtype != np.float32:
+        out = np.empty(shape, dtype = np.float32)
+    image.pixels.foreach_get(out.ravel())
+    return out
+
+
+def resamplePixels(source, rows, columns, filter = "NEAREST"):
+    '''Resamples (sourceRows, sourceColumns, channels) pixels to rows*columns'''
+    if filter == "BILINEAR":
+        return resampleBilinear(source, rows, columns)
+    if filter == "BOX":
+        # reduceat is much faster along the columns, they shrink the data first
+        source = resampleBoxAxis(source, columns, 1)
+        return resampleBoxAxis(source, rows, 0)
+    return source[nearestIndices(len(source), rows)][:, nearestIndices(source.shape[1], columns)]
+
+
+def nearestIndices(sourceSize, size):
+    return np.arange(size) * sourceSize // size
+
+
+def resampleBilinear(source, rows, columns):
+    rowIndices, rowWeights = bilinearIndices(source.shape[0], rows)
+    columnIndices, columnWeights = bilinearIndices(source.shape[1], columns)
+    # blend the rows first, then the columns of the smaller result
+    top = source[rowIndices]
+    blended = top + (source[rowIndices + 1] - top) * rowWeights[:, None, None]
+    left = blended[:, columnIndices]
+    right = blended[:, columnIndices + 1]
+    return left + (right - left) * columnWeights[None, :, None]
+
+
+def bilinearIndices(sourceSize, size):
+    '''First source index and weight of the second one for every target pixel'''
+    if sourceSize == 1:
+        return np.zeros(size, dtype = int), np.zeros(size, dtype = np.float32)
+    # pixel centers of the target mapped into the source
+    positions = (np.arange(size) + 0.5) * (sourceSize / size) - 0.5
+    positions = np.clip(positions, 0, sourceSize - 1)
+    indices = np.minimum(positions.astype(int), sourceSize - 2)
+    return indices, (positions - indices).astype(np.float32)
+
+
+def resampleBoxAxis(source, size, axis):
+    sourceSize = source.shape[axis]
+    if size >= sourceSize:
+        # upsampling covers less than a pixel, there is nothing to average
+        return np.take(source, nearestIndices(sourceSize, size), axis = axis)
+
+    starts = nearestIndices(sourceSize, size)
+    counts = np.diff(np.append(starts, sourceSize))
+    sums = np.add.reduceat(source, starts, axis = axis)
+    shape = [1] * source.ndim
+    shape[axis] = size
+    return sums / counts.reshape(shape).astype(np.float32)
+
+
+def toRGBA(source, out):
+    '''Writes 1 to 4 channel pixels into the RGBA array out'''
+    channels = source.shape[2]
+    if channels < 3:
+        # gray or gray and alpha
+        out[:, :, 0:3] = source[:, :, 0:1]
+    else:
+        out[:, :, 0:3] = source[:, :, 0:3]
+    if channels in (2, 4):
+        out[:, :, 3] = source[:, :, -1]
+    else:
+        out[:, :, 3] = 1.0
+    return out
+
+
+# Output images patched one channel at a time keep a numpy mirror of their
+# pixels, so changing a channel doesn't need a full read of the image. Full
+# writes go straight to the image and drop the mirror. The mirrors are
+# released when the bake ends.
+
+# image name -> (rows, columns, channels) float32 pixels
+imageMirrors = {}
+
+
+def getImageMirror(image):
+    '''Cached pixels of image, read from the image the first time'''
+    columns, rows = image.size
+    shape = (rows, columns, image.channels)
+    mirror = imageMirrors.get(image.name)
+    if mirror is None or mirror.shape != shape:
+        mirror = imageMirrors[image.name] = readImagePixels(image)
+    return mirror
+
+
+def writeImagePixels(image, pixels):
+    '''Writes pixels with the size of the image to image'''
+    forgetImage(image.name)
+    image.pixels.foreach_set(np.ascontiguousarray(pixels, dtype = np.float32).ravel())
+    image.update()
+
+
+def writeImageChannel(image, channel, values):
+    '''Replaces one channel of image with the (rows, columns) values'''
+    mirror = getImageMirror(image)
+    mirror[:, :, channel] = values
+    image.pixels.foreach_set(mirror.ravel())
+    image.update()
+
+
+def forgetImage(name):
+    imageMirrors.pop(name, None)
+
+
+def clearImageMirrors():
+    imageMirrors.clear()
@@ -0,0 +1,129 @@
+import os
+import sys
+import bpy
+import tempfile
+import subprocess
+import numpy as np
+
+# Evaluation of Blender textures into pixel arrays.
+#
+# Texture.evaluate only takes one coordinate, so the per-pixel call can't
+# be avoided; everything around it is kept out of the loop. The texture
+# coordinates of a resolution are precomputed once, converted to Python
+# lists a block of rows at a time, and the results of every block are
+# written into a preallocated buffer in one assignment.
+#
+# Large grids can be split across headless Blender processes. The texture
+# is written to a temporary library that every worker loads; each worker
+# runs this file and evaluates its rows. auto_load imports this module as
+# well, which is why the worker only starts under __main__.
+
+# pixels evaluated per block
+chunkSize = 65536
+# below this many pixels starting the workers costs more than it saves
+minimumWorkerPixels = 1024 * 1024
+
+# (rows, columns) -> CoordinateGrid
+coordinateGrids = {}
+
+
+class CoordinateGrid:
+    '''Texture coordinates of a rows*columns grid in the -1..1 range'''
+
+    def __init__(self, rows, columns):
+        self.rowCoordinates = np.arange(rows) / rows * 2 - 1
+        self.chunkRows = max(1, chunkSize // columns)
+        # x follows the columns and y the rows, z stays 0
+        self.template = np.zeros((self.chunkRows, columns, 3))
+        self.template[:, :, 0] = np.arange(columns) / columns * 2 - 1
+
+    def getChunk(self, start, end):
+        '''Coordinate lists of the pixels of rows start to end'''
+        chunk = self.template[:end - start]
+        chunk[:, :, 1] = self.rowCoordinates[start:end, None]
+        return chunk.reshape(-1, 3).tolist()
+
+
+def getCoordinateGrid(rows, columns):
+    grid = coordinateGrids.get((rows, columns))
+    if grid is None:
+        grid = coordinateGrids[(rows, columns)] = CoordinateGrid(rows, columns)
+    return grid
+
+
+def evaluateTexture(texture, pixels, intensity = True, workers = 0):
+    '''
+    Fills the contiguous (rows, columns, channels) array pixels with the
+    texture. With intensity a single channel gets the gray value, four get it
+    in RGB with alpha 1; otherwise the RGBA color of the texture is used.
+    '''
+    rows, columns = pixels.shape[:2]
+    if workers > 1 and rows * columns >= minimumWorkerPixels:
+        evaluateInWorkers(texture, pixels, intensity, workers)
+    else:
+        evaluateRows(texture, pixels, rows, 0, intensity)
+    return pixels
+
+
+def evaluateRows(texture, pixels, rows, firstRow, intensity):
+    '''Evaluates the rows firstRow to firstRow + len(pixels) of a rows*columns grid'''
+    columns, channels = pixels.shape[1:]
+    grid = getCoordinateGrid(rows, columns)
+    flat = pixels.reshape(-1, channels)
+    evaluate = texture.evaluate
+
+    for start in range(0, len(pixels), grid.chunkRows):
+        end = min(start + grid.chunkRows, len(pixels))
+        coordinates = grid.getChunk(firstRow + start, firstRow + end)
+        if intensity:
+            flat[start * columns:end * columns, 0] = [evaluate(co)[3] for co in coordinates]
+        else:
+            flat[start * columns:end * columns] = [evaluate(co)[:] for co in coordinates]
+
+    if intensity and channels == 4:
+        flat[:, 1] = flat[:, 0]
+        flat[:, 2] = flat[:, 0]
+        flat[:, 3] = 1.0
+
+
+def evaluateInWorkers(texture, pixels, intensity, workers):
+    rows, columns = pixels.shape[:2]
+    bounds = np.linspace(0, rows, workers + 1).astype(int)
+
+    with tempfile.TemporaryDirectory(prefix = "umog_texture_") as directory:
+        library = os.path.join(directory, "texture.blend")
+        bpy.data.libraries.write(library, {texture})
+
+        processes = []
+        for index, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            output = os.path.join(directory, "rows_{}.npy".format(index))
+            command = [bpy.app.binary_path, "--background", "--factory-startup",
+                       "--python", os.path.abspath(__file__), "--",
+                       library, texture.name, str(rows), str(columns),
+                       str(start), str(end), str(int(intensity)),
+                       str(pixels.shape[2]), pixels.dtype.name, output]
+            process = subprocess.Popen(command, stdout = subprocess.DEVNULL,
+                                       stderr = subprocess.PIPE)
+            processes.append((start, end, output, process))
+
+        for start, end, output, process in processes:
+            errors = process.communicate()[1]
+            if process.returncode != 0:
+                raise RuntimeError("Texture worker failed: " + errors.decode(errors = "replace"))
+            pixels[start:end] = np.load(output)
+
+
+def runWorker(argv):
+    library, textureName, rows, columns, start, end, intensity, channels, dtype, output = argv
+    rows, columns, start, end, channels = int(rows), int(columns), int(start), int(end), int(channels)
+
+    with bpy.data.libraries.load(library) as (source, target):
+        target.textures = [textureName]
+
+    pixels = np.empty((end - start, columns, channels), dtype = dtype)
+    evaluateRows(target.textures[0], pixels, rows, start, intensity == "1")
+    np.save(output, pixels)
+
+
+if __name__ == "__main__":
+    runWorker(sys.argv[sys.argv.index("--") + 1:])
@@ -1,6 +1,9 @@
 import bpy
 import math
 from .. utils.nodes import getUMOGNodeTree
+from .. utils.profiler import lastProfiles
+from .. bake.progress import activeBakes
+from .. bake.checkpoint import findCheckpointFrame
 
 class UMOGBakePanel:
     bl_label = "Bake Properties"
@@ -36,10 +39,24 @@ class UMOGBakePanel:
                 props = tree.properties
                 totalFrames = props.EndFrame - props.StartFrame
 
-                row = layout.row()
-                row.scale_y = 1.5
-                bakeOP = row.operator("umog.bake", icon='FORCE_LENNARDJONES', text="Bake Nodetree")
-                bakeOP.tree = tree.name
+                progress = activeBakes.get(tree.name)
+                if progress is None:
+                    row = layout.row()
+                    row.scale_y = 1.5
+                    bakeOP = row.operator("umog.bake", icon='FORCE_LENNARDJONES', text="Bake Nodetree")
+                    bakeOP.tree = tree.name
+                    checkpointFrame = findCheckpointFrame(tree)
+                    if checkpointFrame is not None:
+                        row = layout.row()
+                        resumeOP = row.operator("umog.bake", icon='RECOVER_LAST',
+                                                text="Resume after Frame " + str(checkpointFrame))
+                        resumeOP.tree = tree.name
+                        resumeOP.resume = True
+                else:
+                    box = layout.box()
+                    col = box.column(align=True)
+                    col.label(text="Baking: " + progress.getStatus(), icon='SORTTIME')
+                    col.label(text="Press Esc to cancel", icon='CANCEL')
                 row = layout.row()
                 row.template_ID(snode, "node_tree", new="node.new_node_tree")
                 row = layout.row()
@@ -114,6 +131,65 @@ class UMOGBakePanel:
                     row.label(text="Texture Resolution:", icon='RENDER_REGION')
                     row = box.row(align=True)
                     row.prop(props, 'TextureResolution', text="")
+                    row = box.row(align=True)
+                    row.prop(props, 'TextureWorkers')
+                    row = box.row(align=True)
+                    row.prop(props, 'ImageFilter', text="")
+                    row.prop(props, 'TexturePrecision', text="")
+                    #===================
+                    #Frames per Tick
+                    row = box.row(align=True)
+                    row.prop(props, 'FramesPerTick')
+                    #===================
+                    #Checkpoints
+                    col = box.column(align=True)
+                    col.prop(props, 'CheckpointInterval')
+                    if props.CheckpointInterval > 0:
+                        col.prop(props, 'CheckpointDirectory', text="")
+                    #===================
+                    #Scalar Fusion
+                    row = box.row(align=True)
+                    row.prop(props, 'FuseScalarNodes')
+                    #===================
+                    #Bake Target
+                    row = box.row(align=True)
+                    row.prop(props, 'BakeTarget', text="")
+                    if props.BakeTarget == "CACHE":
+                        col = box.column(align=True)
+                        col.prop(props, 'CacheDirectory', text="")
+                        col.prop(props, 'CacheEncoding', text="")
+                        if props.CacheEncoding == "SPARSE":
+                            col.prop(props, 'CacheTolerance')
+                        col.prop(props, 'CacheChunkSize')
+                        col.prop(props, 'CacheCompress')
+                #===================
+                #Profiler
+                row = layout.row()
+                row.prop(props, "ProfileBake", toggle=True, icon="TIME")
+                profile = lastProfiles.get(tree.name)
+                if props.ProfileBake and profile is not None:
+                    box = layout.box()
+                    box.label(text="Last Bake: {:.1f} ms".format(profile.totalTime / 1e6))
+                    col = box.column(align=True)
+                    col.label(text="Slowest Nodes:")
+                    for name, nodeType, duration in profile.getTopNodes():
+                        row = col.row(align=True)
+                        row.label(text=name)
+                        row.label(text="{:.1f} ms".format(duration / 1e6))
+                    col = box.column(align=True)
+                    col.label(text="Node Types:")
+                    for nodeType, duration in list(profile.getTotalsBy(1).items())[:5]:
+                        row = col.row(align=True)
+                        row.label(text=nodeType.replace("umog_", ""))
+                        row.label(text="{:.1f} ms".format(duration / 1e6))
+                    col = box.column(align=True)
+                    col.label(text="Phases:")
+                    for phase, duration in profile.getTotalsBy(2).items():
+                        row = col.row(align=True)
+                        row.label(text=phase)
+                        row.label(text="{:.1f} ms".format(duration / 1e6))
+                    exportOP = box.operator("umog.export_profile", text="Export JSON", icon="EXPORT")
+                    exportOP.tree = tree.name
                 
         except:
             pass
@@ -5,18 +5,17 @@ import sys
 import os
 from os.path import dirname, join, abspath, basename
 
-from ..preferences import getDeveloperSettings
+from .trace import developerFlags
 
 currentDirectory = dirname(abspath(__file__))
 addonName = basename(os.path.dirname(currentDirectory))
 
 def DBG(*messages, **options):
-    try:
-        isTraceEnabled = getDeveloperSettings().traceInfo
-        isExecutionInfoEnabled = getDeveloperSettings().executionInfo
-    except:
+    isTraceEnabled = developerFlags.traceInfo
+    isExecutionInfoEnabled = developerFlags.executionInfo
+    if not (isTraceEnabled or isExecutionInfoEnabled):
         return
-    
+
     executionInfoExists = False
 
     if isTraceEnabled or isExecutionInfoEnabled:
@@ -1,10 +1,16 @@
 import bpy
 from .handlers import eventUMOGHandler
 from . debug import *
+from . trace import tracer
 from . nodes import getUMOGNodeTree
+from .. node_tree.execution_plan import discardExecutionPlans
 
 @eventUMOGHandler("FILE_LOAD_POST")
 def updateOnLoad():
+    discardExecutionPlans()
+    # no editors to update in background mode
+    if bpy.context.screen is None:
+        return
     for area in bpy.context.screen.areas:
         if area.type == "NODE_EDITOR":
             tree = area.spaces.active.node_tree
@@ -13,6 +19,9 @@ def updateOnLoad():
 
 @eventUMOGHandler("FRAME_CHANGE_POST")
 def updateOnFrameChange(scene):
+    # no editors to update in background mode
+    if bpy.context.screen is None:
+        return
     for area in bpy.context.screen.areas:
         if area.type == "NODE_EDITOR":
             tree = area.spaces.active.node_tree
@@ -22,7 +31,7 @@ def updateOnFrameChange(scene):
 def propUpdate(self = None, context = None):
 
     def nodeTreeUpdateFrom(node):
-        if node in node.nodeTree.linearizedNodes:
+        if node.nodeTree.executionPlan.contains(node):
             node.nodeTree.updateFrom(node)
 
 
@@ -33,11 +42,9 @@ def propUpdate(self = None, context = None):
         if hasattr(self, 'isUMOGNodeSocket'):
             if self.isUMOGNodeSocket:
                 if not self.socketRecentlyRefreshed:
-                    DBG("PROPERTY CHANGED FROM SOCKET:",
-                        "Type:   "+self.dataType,
-                        "Name:   "+self.name,
-                        "Path:   "+self.path_from_id(),
-                        trace = True)
+                    if tracer.enabled:
+                        tracer.record("propertyChanged", self.node.name, self.identifier,
+                                      arguments = (self.dataType,))
 
                     nodeTreeUpdateFrom(self.node)
                 else:
@@ -1,7 +1,10 @@
 import bpy
 from functools import wraps
 from bpy.app.handlers import persistent
-from .debug import *
+from .trace import tracer, developerFlags
+from ..preferences import getDeveloperSettings
+from ..bake.playback import loadCachedFrame
+from ..texture.cache import textureCache
 # def validCallback(function):
 #     @wraps(function)
 #     def wrapper(self, context):
@@ -16,6 +19,7 @@ fileSavePreUMOGHandlers = []
 fileLoadPostUMOGHandlers = []
 addonLoadPostUMOGHandlers = []
 sceneUpdatePostUMOGHandlers = []
+depsgraphUpdatePostUMOGHandlers = []
 frameChangePostUMOGHandlers = []
 
 renderPreUMOGHandlers = []
@@ -29,6 +33,7 @@ def eventUMOGHandler(event):
         if event == "FILE_LOAD_POST": fileLoadPostUMOGHandlers.append(function)
         if event == "ADDON_LOAD_POST": addonLoadPostUMOGHandlers.append(function)
         if event == "SCENE_UPDATE_POST": sceneUpdatePostUMOGHandlers.append(function)
+        if event == "DEPSGRAPH_UPDATE_POST": depsgraphUpdatePostUMOGHandlers.append(function)
         if event == "FRAME_CHANGE_POST": frameChangePostUMOGHandlers.append(function)
 
         if event == "RENDER_INIT": renderInitUMOGHandlers.append(function)
@@ -41,59 +46,74 @@ def eventUMOGHandler(event):
 umogAddonChanged = False
 
 @persistent
-def sceneUpdatePostUMOG(scene):
+def sceneUpdatePostUMOG(scene, depsgraph = None):
     for handler in sceneUpdatePostUMOGHandlers:
-        DBG(str(handler))
-        handler(scene)
+        tracer.call("handler", handler, handler, scene)
+
+    if len(depsgraphUpdatePostUMOGHandlers) > 0:
+        # older versions of Blender only pass the scene
+        if depsgraph is None:
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+        for handler in depsgraphUpdatePostUMOGHandlers:
+            tracer.call("handler", handler, handler, scene, depsgraph)
 
     global umogAddonChanged
     if umogAddonChanged:
         umogAddonChanged = False
         for handler in addonLoadPostUMOGHandlers:
-            DBG(str(handler))
-            handler()
+            tracer.call("handler", handler, handler)
 
 @persistent
 def savePreUMOG(scene):
     for handler in fileSavePreUMOGHandlers:
-        DBG(str(handler))
-        handler()
+        tracer.call("handler", handler, handler)
 
 @persistent
 def loadPostUMOG(scene):
     for handler in fileLoadPostUMOGHandlers:
-        DBG(str(handler))
-        handler()
+        tracer.call("handler", handler, handler)
 
 @persistent
 def renderPreUMOG(scene):
     for handler in renderPreUMOGHandlers:
-        DBG(str(handler))
-        handler()
+        tracer.call("handler", handler, handler)
 
 @persistent
 def frameChangedPostUMOG(scene):
     for handler in frameChangePostUMOGHandlers:
-        DBG(str(handler))
-        handler(scene)
+        tracer.call("handler", handler, handler, scene)
 
 @persistent
 def renderInitializedUMOG(scene):
     for handler in renderInitUMOGHandlers:
-        DBG(str(handler))
-        handler()
+        tracer.call("handler", handler, handler)
 
 @persistent
 def renderCancelledUMOG(scene):
     for handler in renderCancelUMOGHandlers:
-        DBG(str(handler))
-        handler()
+        tracer.call("handler", handler, handler)
 
 @persistent
 def renderCompletedUMOG(scene):
     for handler in renderCancelUMOGHandlers:
-        DBG(str(handler))
-        handler()
+        tracer.call("handler", handler, handler)
+
+@eventUMOGHandler("FRAME_CHANGE_POST")
+def streamCachedFrames(scene):
+    for obj in scene.objects:
+        if obj.type == 'MESH' and obj.umogCacheDirectory != "":
+            loadCachedFrame(obj, scene.frame_current)
+
+@eventUMOGHandler("DEPSGRAPH_UPDATE_POST")
+def discardChangedTextures(scene, depsgraph):
+    for update in depsgraph.updates:
+        if isinstance(update.id, (bpy.types.Texture, bpy.types.Image)):
+            textureCache.discard(update.id.name)
+
+@eventUMOGHandler("ADDON_LOAD_POST")
+@eventUMOGHandler("FILE_LOAD_POST")
+def cacheDeveloperSettings():
+    developerFlags.update(getDeveloperSettings())
 
 def register():
     bpy.app.handlers.frame_change_post.append(frameChangedPostUMOG)
@@ -0,0 +1,119 @@
+import json
+from time import perf_counter_ns
+from collections import defaultdict
+
+# Per node and per phase timings of a bake.
+#
+# UMOGNodeTree.execute routes the node phases through a profiler. When
+# profiling is disabled it gets a NullProfiler that calls the functions
+# directly, and the runtime keeps its unwrapped per substep methods, so
+# the frame loop doesn't pay for the instrumentation.
+
+phases = ("packSockets", "preExecute", "refreshNode", "execute", "postFrame", "postBake")
+
+# tree name -> BakeProfiler of the last profiled bake
+lastProfiles = {}
+
+
+class NullProfiler:
+    isEnabled = False
+    frame = None
+
+    def call(self, phase, node, function, *args):
+        return function(*args)
+
+
+class BakeProfiler:
+    isEnabled = True
+
+    def __init__(self, treeName):
+        self.treeName = treeName
+        self.frame = None
+        # (node name, node type, phase) -> [nanoseconds, calls]
+        self.timings = defaultdict(lambda: [0, 0])
+        # frame -> nanoseconds
+        self.frameTimings = defaultdict(int)
+
+    def record(self, phase, name, nodeType, duration):
+        timing = self.timings[(name, nodeType, phase)]
+        timing[0] += duration
+        timing[1] += 1
+        if self.frame is not None:
+            self.frameTimings[self.frame] += duration
+
+    def call(self, phase, node, function, *args):
+        start = perf_counter_ns()
+        result = function(*args)
+        self.record(phase, node.name, node.bl_idname, perf_counter_ns() - start)
+        return result
+
+    def wrapNodePhase(self, phase, function):
+        '''Times a RuntimeTree method that takes a RuntimeNode'''
+        def timedPhase(runtimeNode):
+            start = perf_counter_ns()
+            function(runtimeNode)
+            node = runtimeNode.node
+            self.record(phase, node.name, node.bl_idname, perf_counter_ns() - start)
+        return timedPhase
+
+    def wrapStep(self, step):
+        '''Times a fused scalar group as one execute phase'''
+        return ProfiledStep(self, step)
+
+    @property
+    def totalTime(self):
+        return sum(timing[0] for timing in self.timings.values())
+
+    def getTopNodes(self, count = 5):
+        '''Returns [(node name, node type, nanoseconds)] of the slowest nodes'''
+        totals = defaultdict(int)
+        for (name, nodeType, phase), (duration, calls) in self.timings.items():
+            totals[(name, nodeType)] += duration
+        ranked = sorted(totals.items(), key = lambda item: item[1], reverse = True)
+        return [(name, nodeType, duration) for (name, nodeType), duration in ranked[:count]]
+
+    def getTotalsBy(self, field):
+        '''Nanoseconds per node type (field 1) or per phase (field 2)'''
+        totals = defaultdict(int)
+        for key, (duration, calls) in self.timings.items():
+            totals[key[field]] += duration
+        return dict(sorted(totals.items(), key = lambda item: item[1], reverse = True))
+
+    def toDict(self):
+        return {
+            "tree": self.treeName,
+            "totalNanoseconds": self.totalTime,
+            "nodes": [{"name": name, "type": nodeType, "phase": phase,
+                       "nanoseconds": duration, "calls": calls}
+                      for (name, nodeType, phase), (duration, calls) in self.timings.items()],
+            "types": self.getTotalsBy(1),
+            "phases": self.getTotalsBy(2),
+            "frames": {str(frame): duration for frame, duration in sorted(self.frameTimings.items())}}
+
+    def exportJSON(self, path):
+        with open(path, "w") as jsonFile:
+            json.dump(self.toDict(), jsonFile, indent = 1)
+
+
+class ProfiledStep:
+    def __init__(self, profiler, step):
+        self.profiler = profiler
+        self.step = step
+        self.name = "Fused Scalar Group ({})".format(
+            ", ".join(runtimeNode.name for runtimeNode in step.runtimeNodes))
+
+    def run(self, runtime):
+        start = perf_counter_ns()
+        self.step.run(runtime)
+        self.profiler.record("execute", self.name, "FusedScalarGroup", perf_counter_ns() - start)
+
+    def finish(self):
+        self.step.finish()
+
+
+def getProfiler(tree):
+    if not tree.properties.ProfileBake:
+        return NullProfiler()
+    profiler = BakeProfiler(tree.name)
+    lastProfiles[tree.name] = profiler
+    return profiler
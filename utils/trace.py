@@ -0,0 +1,114 @@
+import json
+from time import perf_counter_ns
+
+# Structured replacement for the DBG prints on hot paths.
+#
+# Events go into a preallocated ring buffer of (timestamp, event, node,
+# socket, duration) records. The enable flags are copies of the developer
+# preferences, refreshed when those change, so a disabled tracer costs one
+# attribute check at the call site. Arguments are stored as they are and
+# only turned into strings when the buffer is exported as a Chrome trace
+# (chrome://tracing, Perfetto).
+
+
+class DeveloperFlags:
+    '''Cached developer preferences, read on every DBG and trace call'''
+    executionInfo = False
+    traceInfo = False
+
+    def update(self, developer):
+        self.executionInfo = developer.executionInfo
+        self.traceInfo = developer.traceInfo
+        tracer.enabled = developer.traceEvents
+        if developer.traceBufferSize != tracer.capacity:
+            tracer.resize(developer.traceBufferSize)
+
+
+class TraceBuffer:
+    def __init__(self, capacity):
+        self.enabled = False
+        self.resize(capacity)
+
+    def resize(self, capacity):
+        self.capacity = capacity
+        self.timestamps = [0] * capacity
+        self.durations = [0] * capacity
+        self.events = [None] * capacity
+        self.nodes = [None] * capacity
+        self.sockets = [None] * capacity
+        self.arguments = [None] * capacity
+        # number of records ever written; the oldest are overwritten
+        self.count = 0
+
+    def clear(self):
+        self.resize(self.capacity)
+
+    now = staticmethod(perf_counter_ns)
+
+    def record(self, event, node = None, socket = None, timestamp = None, duration = 0, arguments = None):
+        index = self.count % self.capacity
+        self.timestamps[index] = perf_counter_ns() if timestamp is None else timestamp
+        self.durations[index] = duration
+        self.events[index] = event
+        self.nodes[index] = node
+        self.sockets[index] = socket
+        self.arguments[index] = arguments
+        self.count += 1
+
+    def call(self, event, node, function, *args, **kwargs):
+        if not self.enabled:
+            return function(*args, **kwargs)
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.record(event, node, None, start, perf_counter_ns() - start)
+
+    def iterRecords(self):
+        '''Records from oldest to newest'''
+        first = max(0, self.count - self.capacity)
+        for position in range(first, self.count):
+            index = position % self.capacity
+            yield (self.timestamps[index], self.events[index], self.nodes[index],
+                   self.sockets[index], self.durations[index], self.arguments[index])
+
+    def toChromeTrace(self):
+        traceEvents = []
+        for timestamp, event, node, socket, duration, arguments in self.iterRecords():
+            args = {}
+            if node is not None:
+                args["node"] = formatValue(node)
+            if socket is not None:
+                args["socket"] = formatValue(socket)
+            if arguments is not None:
+                args["values"] = [formatValue(value) for value in arguments]
+
+            traceEvent = {"name": event, "cat": "umog", "pid": 0, "tid": 0,
+                          "ts": timestamp / 1000, "args": args}
+            if duration > 0:
+                traceEvent["ph"] = "X"
+                traceEvent["dur"] = duration / 1000
+            else:
+                traceEvent["ph"] = "i"
+                traceEvent["s"] = "t"
+            traceEvents.append(traceEvent)
+
+        return {"traceEvents": traceEvents, "displayTimeUnit": "ms",
+                "otherData": {"recorded": self.count, "capacity": self.capacity}}
+
+    def exportJSON(self, path):
+        with open(path, "w") as file:
+            json.dump(self.toChromeTrace(), file)
+
+
+def formatValue(value):
+    if isinstance(value, str):
+        return value
+    name = getattr(value, "__qualname__", None)
+    if name is not None:
+        return getattr(value, "__module__", "").rsplit(".", 1)[-1] + "." + name
+    return repr(value)
+
+
+tracer = TraceBuffer(65536)
+developerFlags = DeveloperFlags()